@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# --- Precomputed analytics bundles ---
+# A background job (this script with --watch, or the thread the dev server starts) recomputes a week's
+# arbitrage, value bets, line moves and props grid whenever its source files change, and publishes them
+# as nfl_data/analytics/week_N.json. show_week then only loads and renders the bundle; it computes
+# inline only while no bundle matches the current sources. Opt-in: create nfl_data/analytics.
+BUNDLE_DIR_NAME = 'analytics'
+BUNDLE_VERSION = 1 # Bumped whenever the layout changes; bundles of another version count as missing
+WORKER_INTERVAL = 30 # Seconds between source checks in watch mode
+
+_bundle_cache = {} # path -> ((mtime_ns, size), bundle): each worker parses a published bundle once
+_bundle_cache_lock = threading.Lock()
+
+
+def is_enabled(bundle_dir):
+    return os.path.isdir(bundle_dir)
+
+def bundle_path(bundle_dir, week_number):
+    return os.path.join(bundle_dir, f'week_{week_number}.json')
+
+def _fingerprint_list(fingerprint):
+    return [list(item) for item in fingerprint]
+
+def json_default(value):
+    if isinstance(value, np.generic): # numpy scalars from the vectorized analytics
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def make_bundle(week_number, fingerprint, analytics, timings_ms):
+    source_mtime_ns = max((item[1] for item in fingerprint), default=None)
+    return {
+        'version': BUNDLE_VERSION,
+        'week': week_number,
+        'fingerprint': _fingerprint_list(fingerprint),
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'source_mtime': datetime.fromtimestamp(source_mtime_ns / 1e9).isoformat(timespec='seconds') if source_mtime_ns else None,
+        'timings_ms': timings_ms,
+        'analytics': analytics,
+    }
+
+def write_bundle(bundle_dir, week_number, bundle):
+    """Publishes a bundle as compact JSON under a temporary name, then renames it into place."""
+    path = bundle_path(bundle_dir, week_number)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, separators=(',', ':'), default=json_default)
+    os.replace(tmp_path, path)
+    return path
+
+def read_bundle(bundle_dir, week_number):
+    """The week's published bundle (parsed once per file version), or None if there is none."""
+    path = bundle_path(bundle_dir, week_number)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    file_version = (stat.st_mtime_ns, stat.st_size)
+    with _bundle_cache_lock:
+        cached = _bundle_cache.get(path)
+        if cached is not None and cached[0] == file_version:
+            return cached[1]
+    with open(path, encoding='utf-8') as f:
+        bundle = json.load(f)
+    with _bundle_cache_lock:
+        _bundle_cache[path] = (file_version, bundle)
+    return bundle
+
+def is_current(bundle, fingerprint):
+    """True if the bundle was built from exactly the source files `fingerprint` describes."""
+    return bundle is not None and bundle.get('version') == BUNDLE_VERSION \
+        and bundle.get('fingerprint') == _fingerprint_list(fingerprint)
+
+
+def build_bundles(weeks=None, force=False):
+    """Rebuilds the bundle of every week (default: all) whose sources changed. Returns {week: timings_ms}."""
+    import app # Deferred: the app imports this module
+
+    bundle_dir = app.get_bundle_dir()
+    os.makedirs(bundle_dir, exist_ok=True)
+    built = {}
+    for week_number in weeks or app.get_available_weeks(app.get_data_dir()):
+        fingerprint = app.get_week_fingerprint(week_number)
+        if not fingerprint:
+            continue
+        if not force and is_current(read_bundle(bundle_dir, week_number), fingerprint):
+            continue
+        analytics, error_msg, timings_ms = app.compute_week_analytics(week_number)
+        if error_msg or analytics is None:
+            print(f"  Week {week_number}: skipped ({error_msg})")
+            continue
+        write_bundle(bundle_dir, week_number, make_bundle(week_number, fingerprint, analytics, timings_ms))
+        built[week_number] = timings_ms
+        print(f"  Week {week_number}: bundle built in {timings_ms['total']:.0f} ms")
+    return built
+
+def staleness_report(weeks=None):
+    """
+    One entry per week: when its bundle was built, when its sources last changed, and whether the
+    bundle is stale (older than the newest scrape). lag_seconds is how far the bundle is behind.
+    """
+    import app
+
+    bundle_dir = app.get_bundle_dir()
+    report = []
+    for week_number in weeks or app.get_available_weeks(app.get_data_dir()):
+        fingerprint = app.get_week_fingerprint(week_number)
+        bundle = read_bundle(bundle_dir, week_number)
+        source_mtime_ns = max((item[1] for item in fingerprint), default=None)
+        stale = not is_current(bundle, fingerprint)
+        lag_seconds = None
+        if stale and bundle is not None and source_mtime_ns:
+            lag_seconds = round(source_mtime_ns / 1e9 - datetime.fromisoformat(bundle['built_at']).timestamp())
+        report.append({
+            'week': week_number,
+            'built_at': bundle['built_at'] if bundle else None,
+            'source_mtime': datetime.fromtimestamp(source_mtime_ns / 1e9).isoformat(timespec='seconds') if source_mtime_ns else None,
+            'stale': stale,
+            'lag_seconds': lag_seconds,
+            'timings_ms': bundle['timings_ms'] if bundle else None,
+        })
+    return report
+
+
+def run_worker(interval=WORKER_INTERVAL, stop_event=None):
+    """Watch mode: rebuilds changed weeks every `interval` seconds until stop_event is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            build_bundles()
+        except Exception as e: # A bad scrape must not kill the worker; the next pass retries
+            print(f"❌ Analytics bundle build FAILED: {e}")
+        for entry in staleness_report():
+            if entry['stale']:
+                print(f"  ⚠️ Week {entry['week']}: bundle is stale (built {entry['built_at']}, sources changed {entry['source_mtime']})")
+        stop_event.wait(interval)
+
+def start_background_worker(interval=WORKER_INTERVAL):
+    """Runs the watch loop in a daemon thread of the current process. Returns (thread, stop_event)."""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run_worker, args=(interval, stop_event), name='analytics-bundles', daemon=True)
+    thread.start()
+    return thread, stop_event
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the dashboard's per-week analytics bundles.")
+    parser.add_argument('weeks', nargs='*', type=int, help="Weeks to build (default: all)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the bundle is current")
+    parser.add_argument('--watch', action='store_true', help="Keep running and rebuild weeks whose sources change")
+    parser.add_argument('--interval', type=int, default=WORKER_INTERVAL, help="Seconds between checks in watch mode")
+    parser.add_argument('--status', action='store_true', help="Only report which bundles are stale")
+    args = parser.parse_args()
+
+    if args.status:
+        for entry in staleness_report(args.weeks):
+            state = 'STALE' if entry['stale'] else 'current'
+            print(f"  Week {entry['week']}: {state} (built {entry['built_at']}, sources changed {entry['source_mtime']})")
+    elif args.watch:
+        print(f"Watching for new scrapes every {args.interval}s (Ctrl+C to stop) ...")
+        run_worker(args.interval)
+    else:
+        built = build_bundles(args.weeks, force=args.force)
+        print(f"✅ Built analytics bundles for weeks {sorted(built)}.")
@@ -1,17 +1,35 @@
+import gzip
+import hashlib
+import json
 import os
 import re
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
 import pandas as pd
-import unicodedata
-from collections import defaultdict
-from flask import Flask, render_template, redirect, url_for, request
+from flask import Flask, render_template, redirect, url_for, request, jsonify, stream_with_context
+
+import analytics_bundle
+import history_events
+import live_updates
+import odds_db
+import odds_store
+import week_snapshots
+from history_ingest import read_csv_incremental
+from prop_parsing import (
+    TEAM_MAP, normalize_player_name, normalize_game_name, parse_player_prop, build_player_prefix_index,
+    extract_player_name
+)
 
 app = Flask(__name__)
 
 # --- Constants & Mappings ---
-TEAM_MAP = {
-    'ARI Cardinals': 'Arizona Cardinals', 'ATL Falcons': 'Atlanta Falcons', 'BAL Ravens': 'Baltimore Ravens', 'BUF Bills': 'Buffalo Bills', 'CAR Panthers': 'Carolina Panthers', 'CHI Bears': 'Chicago Bears', 'CIN Bengals': 'Cincinnati Bengals', 'CLE Browns': 'Cleveland Browns', 'DAL Cowboys': 'Dallas Cowboys', 'DEN Broncos': 'Denver Broncos', 'DET Lions': 'Detroit Lions', 'GB Packers': 'Green Bay Packers', 'HOU Texans': 'Houston Texans', 'IND Colts': 'Indianapolis Colts', 'JAX Jaguars': 'Jacksonville Jaguars', 'KC Chiefs': 'Kansas City Chiefs', 'LV Raiders': 'Las Vegas Raiders', 'LA Chargers': 'Los Angeles Chargers', 'LA Rams': 'Los Angeles Rams', 'MIA Dolphins': 'Miami Dolphins', 'MIN Vikings': 'Minnesota Vikings', 'NE Patriots': 'New England Patriots', 'NO Saints': 'New Orleans Saints', 'NY Giants': 'New York Giants', 'NY Jets': 'New York Jets', 'PHI Eagles': 'Philadelphia Eagles', 'PIT Steelers': 'Pittsburgh Steelers', 'SF 49ers': 'San Francisco 49ers', 'SEA Seahawks': 'Seattle Seahawks', 'TB Buccaneers': 'Tampa Bay Buccaneers', 'TEN Titans': 'Tennessee Titans', 'WAS Commanders': 'Washington Commanders'
-}
-
 FANDUEL_LOGO_MAP = {
     'Arizona Cardinals': 'arizona_cardinals', 'Atlanta Falcons': 'atlanta_falcons', 'Baltimore Ravens': 'baltimore_ravens', 'Buffalo Bills': 'buffalo_bills', 'Carolina Panthers': 'carolina_panthers', 'Chicago Bears': 'chicago_bears', 'Cincinnati Bengals': 'cincinnati_bengals', 'Cleveland Browns': 'cleveland_browns', 'Dallas Cowboys': 'dallas_cowboys', 'Denver Broncos': 'denver_broncos', 'Detroit Lions': 'detroit_lions', 'Green Bay Packers': 'green_bay_packers', 'Houston Texans': 'houston_texans', 'Indianapolis Colts': 'indianapolis_colts', 'Jacksonville Jaguars': 'jacksonville_jaguar', 'Kansas City Chiefs': 'kansas_city_chiefs', 'Las Vegas Raiders': 'las_vegas_raiders', 'Los Angeles Chargers': 'los_angeles_chargers', 'Los Angeles Rams': 'los_angeles_rams', 'Miami Dolphins': 'miami_dolphins', 'Minnesota Vikings': 'minnesota_vikings', 'New England Patriots': 'new_england_patriots', 'New Orleans Saints': 'new_orleans_saints', 'New York Giants': 'new_york_giants', 'New York Jets': 'new_york_jets', 'Philadelphia Eagles': 'philadelphia_eagles', 'Pittsburgh Steelers': 'pittsburgh_steelers', 'San Francisco 49ers': 'san_francisco_49ers', 'Seattle Seahawks': 'seattle_seahawks', 'Tampa Bay Buccaneers': 'tampa_bay_buccaneers', 'Tennessee Titans': 'tennessee_titans', 'Washington Commanders': 'washington_commanders'
 }
@@ -31,44 +49,86 @@ def get_available_weeks(data_dir):
     weeks.sort(reverse=True) # Sort with the latest week first
     return weeks
 
-def normalize_player_name(name):
-    return unicodedata.normalize('NFD', name).encode('ascii', 'ignore').decode("utf-8").lower().replace(" jr.", "").replace(" sr.", "").replace(".", "").replace("'", "")
-
-def normalize_game_name(game_str, team_map):
-    for short, long in team_map.items():
-        game_str = game_str.replace(short, long)
-    teams = game_str.split(' @ ')
-    return ' @ '.join(sorted(teams))
-
-def convert_odds_to_prob(odds):
-    odds = float(odds)
-    if odds > 0: return 100 / (odds + 100)
-    return abs(odds) / (abs(odds) + 100)
+def american_odds_to_prob(odds):
+    """Implied probability of each of an array of American odds (+150 -> 0.4, -150 -> 0.6)."""
+    odds = np.asarray(odds, dtype=float)
+    abs_odds = np.abs(odds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(odds > 0, 100 / (odds + 100), abs_odds / (abs_odds + 100))
+
+def _group_starts(sorted_group_ids):
+    """Positions where a new group begins in an array of group ids that is already sorted."""
+    if len(sorted_group_ids) == 0:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(np.r_[True, sorted_group_ids[1:] != sorted_group_ids[:-1]])
+
+def _sort_by_group(group_ids):
+    """Stable order that brings each group's rows together, plus the start of each group within that order."""
+    order = np.argsort(group_ids, kind='stable')
+    return order, _group_starts(group_ids[order])
+
+def _pick_row_per_group(order, starts, values, largest=True):
+    """
+    Returns the row position holding each group's max (or min) value, in group id order, or -1 for all-NaN groups.
+    The order is stable, so ties resolve to the earliest row exactly like idxmax/idxmin, and NaNs are skipped.
+    """
+    sorted_values = values[order]
+    best = (np.fmax if largest else np.fmin).reduceat(sorted_values, starts)
+    counts = np.diff(np.r_[starts, len(sorted_values)])
+    hits = np.flatnonzero(sorted_values == np.repeat(best, counts))
+    hit_groups = np.searchsorted(starts, hits, side='right') - 1
+    first_hits = _group_starts(hit_groups)
+    picked = np.full(len(starts), -1, dtype=np.intp)
+    picked[hit_groups[first_hits]] = order[hits[first_hits]]
+    return picked
+
+def _books_per_group(group_ids, sportsbooks, n_groups):
+    """Number of distinct sportsbooks quoting each group."""
+    book_codes, book_labels = pd.factorize(sportsbooks)
+    quoted = np.zeros((n_groups, len(book_labels) + 1), dtype=bool) # Last column collects missing books (code -1)
+    quoted[group_ids, book_codes] = True
+    return quoted.sum(axis=1)
 
 def find_arbitrage_opportunities(props_df):
     if props_df is None or props_df.empty: return []
-    df = props_df.copy()
-    df.dropna(subset=['over_odds', 'under_odds', 'line', 'player_name_norm', 'prop_main', 'prop_qualifier'], inplace=True)
+    df = props_df.dropna(subset=['over_odds', 'under_odds', 'line', 'player_name_norm', 'prop_main', 'prop_qualifier'])
+    if df.empty: return []
+
+    # One grouped pass over arrays: ngroup() numbers groups in the same sorted order groupby iterates in
+    group_ids = df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier', 'line'], sort=True, observed=True).ngroup().to_numpy()
+    n_groups = int(group_ids.max()) + 1
+    over_odds = df['over_odds'].to_numpy(dtype=float)
+    under_odds = df['under_odds'].to_numpy(dtype=float)
+
+    multi_book = _books_per_group(group_ids, df['sportsbook'].to_numpy(), n_groups) >= 2
+    order, starts = _sort_by_group(group_ids)
+    best_over_pos = _pick_row_per_group(order, starts, over_odds)
+    best_under_pos = _pick_row_per_group(order, starts, under_odds)
+    first_pos = order[starts] # First row of each group, for display fields
+
+    total_prob = american_odds_to_prob(over_odds[best_over_pos]) + american_odds_to_prob(under_odds[best_under_pos])
+    is_arb = multi_book & (total_prob < 1.0)
+
+    player_names = df['player_name'].to_numpy()
+    prop_mains = df['prop_main'].to_numpy()
+    prop_qualifiers = df['prop_qualifier'].to_numpy()
+    lines = df['line'].to_numpy()
+    books = df['sportsbook'].to_numpy()
+
+    # Only the (few) arbitrage groups are materialized into dicts
     opportunities = []
-    grouped = df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier', 'line'])
-    for _, group in grouped:
-        if len(group['sportsbook'].unique()) < 2: continue
-        best_over_row = group.loc[group['over_odds'].idxmax()]
-        best_under_row = group.loc[group['under_odds'].idxmax()]
-        prob_over = convert_odds_to_prob(best_over_row['over_odds'])
-        prob_under = convert_odds_to_prob(best_under_row['under_odds'])
-        if (prob_over + prob_under) < 1.0:
-            profit_margin = (1 - (prob_over + prob_under)) * 100
-            prop_main = group['prop_main'].iloc[0]
-            prop_qualifier = group['prop_qualifier'].iloc[0]
-            prop_type_display = f"{prop_main} ({prop_qualifier})" if prop_qualifier and prop_qualifier != 'Full Game' else prop_main
-            opportunities.append({
-                'player_name': group['player_name'].iloc[0], 'prop_type': prop_type_display,
-                'line': group['line'].iloc[0],
-                'bet_on_over': {'sportsbook': best_over_row['sportsbook'], 'odds': int(best_over_row['over_odds'])},
-                'bet_on_under': {'sportsbook': best_under_row['sportsbook'], 'odds': int(best_under_row['under_odds'])},
-                'profit_margin': f"{profit_margin:.2f}%"
-            })
+    for g in np.flatnonzero(is_arb):
+        first, over_pos, under_pos = first_pos[g], best_over_pos[g], best_under_pos[g]
+        profit_margin = (1 - total_prob[g]) * 100
+        prop_main, prop_qualifier = prop_mains[first], prop_qualifiers[first]
+        prop_type_display = f"{prop_main} ({prop_qualifier})" if prop_qualifier and prop_qualifier != 'Full Game' else prop_main
+        opportunities.append({
+            'player_name': player_names[first], 'prop_type': prop_type_display,
+            'line': lines[first],
+            'bet_on_over': {'sportsbook': books[over_pos], 'odds': int(over_odds[over_pos])},
+            'bet_on_under': {'sportsbook': books[under_pos], 'odds': int(under_odds[under_pos])},
+            'profit_margin': f"{profit_margin:.2f}%"
+        })
     return opportunities
 
 ODDS_DIFF_THRESHOLD = 20 # Minimum difference in odds (e.g., -110 vs -130) to be flagged
@@ -89,7 +149,25 @@ LINE_DIFF_THRESHOLDS = {
 }
 DEFAULT_LINE_THRESHOLD = 1.0
 
-def find_value_bets(props_df):
+def format_odds(odds):
+    try: return f"+{int(odds)}" if int(odds) > 0 else str(int(odds))
+    except: return str(odds)
+
+def _top_k_positions(values, mask, k):
+    """
+    Positions of the k largest values where mask is set, largest first.
+    Ties keep their original order, matching a stable sort followed by a [:k] slice.
+    """
+    candidates = np.flatnonzero(mask)
+    if len(candidates) > k:
+        candidate_values = values[candidates]
+        kth_value = np.partition(candidate_values, len(candidates) - k)[len(candidates) - k]
+        above = candidates[candidate_values > kth_value]
+        ties = candidates[candidate_values == kth_value][:k - len(above)]
+        candidates = np.sort(np.concatenate([above, ties]))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+def find_value_bets(props_df, top_n=25):
     """
     Finds two types of value opportunities:
     1. Odds Shopping: Same prop/line, but significant odds differences.
@@ -98,262 +176,237 @@ def find_value_bets(props_df):
     if props_df is None or props_df.empty:
         return {'odds_shopping': [], 'line_shopping': []}
 
-    df = props_df.copy()
-    df.dropna(subset=['over_odds', 'under_odds', 'line', 'player_name_norm', 'prop_main', 'prop_qualifier'], inplace=True)
-
-    odds_ops = []
-    line_ops = []
-
-    grouped = df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier'])
-
-    for (player_norm, prop_main, prop_qual), group in grouped:
-        if len(group['sportsbook'].unique()) < 2:
-            continue # Need at least two books to compare
-
-        player_name = group['player_name'].iloc[0]
-        prop_display = f"{prop_main} ({prop_qual})" if prop_qual and prop_qual != 'Full Game' else prop_main
-
-        # --- Logic 1: Odds Shopping (Same Line, Different Odds) ---
-        line_grouped = group.groupby('line')
-        for line, line_group in line_grouped:
-            if len(line_group['sportsbook'].unique()) < 2:
-                continue
+    df = props_df.dropna(subset=['over_odds', 'under_odds', 'line', 'player_name_norm', 'prop_main', 'prop_qualifier'])
+    if df.empty:
+        return {'odds_shopping': [], 'line_shopping': []}
 
-            # Check OVERs for value
-            overs = line_group.dropna(subset=['over_odds'])
-            if len(overs) > 1:
-                best_over = overs.loc[overs['over_odds'].idxmax()]
-                worst_over = overs.loc[overs['over_odds'].idxmin()]
-                diff = best_over['over_odds'] - worst_over['over_odds']
-                if diff >= ODDS_DIFF_THRESHOLD:
-                    odds_ops.append({
-                        'type': 'Over',
-                        'player_name': player_name,
-                        'prop_type': prop_display,
-                        'line': line,
-                        'best_book': best_over['sportsbook'],
-                        'best_odds': int(best_over['over_odds']),
-                        'worst_book': worst_over['sportsbook'],
-                        'worst_odds': int(worst_over['over_odds']),
-                        'diff': int(diff)
-                    })
-            
-            # Check UNDERs for value
-            unders = line_group.dropna(subset=['under_odds'])
-            if len(unders) > 1:
-                best_under = unders.loc[unders['under_odds'].idxmax()]
-                worst_under = unders.loc[unders['under_odds'].idxmin()]
-                diff = best_under['under_odds'] - worst_under['under_odds']
-                if diff >= ODDS_DIFF_THRESHOLD:
-                    odds_ops.append({
-                        'type': 'Under',
-                        'player_name': player_name,
-                        'prop_type': prop_display,
-                        'line': line,
-                        'best_book': best_under['sportsbook'],
-                        'best_odds': int(best_under['under_odds']),
-                        'worst_book': worst_under['sportsbook'],
-                        'worst_odds': int(worst_under['under_odds']),
-                        'diff': int(diff)
-                    })
-
-        # --- Logic 2: Line Shopping (Different Lines, Same Prop) ---
-        unique_lines = group['line'].dropna().unique()
-        if len(unique_lines) > 1:
-            try:
-                max_line_row = group.loc[group['line'].idxmax()]
-                min_line_row = group.loc[group['line'].idxmin()]
-                
-                line_diff = max_line_row['line'] - min_line_row['line']
-                threshold = LINE_DIFF_THRESHOLDS.get(prop_main, DEFAULT_LINE_THRESHOLD)
-
-                if line_diff >= threshold:
-                    def format_odds(odds):
-                        try: return f"+{int(odds)}" if int(odds) > 0 else str(int(odds));
-                        except: return str(odds)
-                    
-                    line_ops.append({
-                        'player_name': player_name,
-                        'prop_type': prop_display,
-                        'bet_over_book': min_line_row['sportsbook'],
-                        'bet_over_line': min_line_row['line'],
-                        'bet_over_odds': format_odds(min_line_row['over_odds']),
-                        'bet_under_book': max_line_row['sportsbook'],
-                        'bet_under_line': max_line_row['line'],
-                        'bet_under_odds': format_odds(max_line_row['under_odds']),
-                        'line_diff': line_diff
-                    })
-            except Exception as e:
-                print(f"Error processing line shopping for {player_name} - {prop_display}: {e}")
-
-    # Sort lists for better display (e.g., biggest diffs first)
-    odds_ops.sort(key=lambda x: x['diff'], reverse=True)
-    line_ops.sort(key=lambda x: x['line_diff'], reverse=True)
-    
-    # --- (MODIFIED) Limit to the top 25 for each category ---
-    top_odds_ops = odds_ops[:25]
-    top_line_ops = line_ops[:25]
-    
-    return {'odds_shopping': top_odds_ops, 'line_shopping': top_line_ops}
+    prop_keys = ['player_name_norm', 'prop_main', 'prop_qualifier']
+    prop_ids = df.groupby(prop_keys, sort=True, observed=True).ngroup().to_numpy()
+    line_ids = df.groupby(prop_keys + ['line'], sort=True, observed=True).ngroup().to_numpy()
+    n_props, n_lines = int(prop_ids.max()) + 1, int(line_ids.max()) + 1
+
+    player_names = df['player_name'].to_numpy()
+    prop_mains = df['prop_main'].to_numpy()
+    prop_qualifiers = df['prop_qualifier'].to_numpy()
+    books = df['sportsbook'].to_numpy()
+    lines = df['line'].to_numpy(dtype=float)
+    odds_by_side = {'Over': df['over_odds'].to_numpy(dtype=float), 'Under': df['under_odds'].to_numpy(dtype=float)}
+
+    prop_order, prop_starts = _sort_by_group(prop_ids)
+    prop_first = prop_order[prop_starts] # Display fields come from the prop's first row
+
+    def prop_display(pos):
+        prop_main, prop_qual = prop_mains[pos], prop_qualifiers[pos]
+        return f"{prop_main} ({prop_qual})" if prop_qual and prop_qual != 'Full Game' else prop_main
+
+    # --- Logic 1: Odds Shopping (Same Line, Different Odds) ---
+    # Candidates are laid out (line group, side) so a stable top-k keeps the old Over-then-Under order
+    line_order, line_starts = _sort_by_group(line_ids)
+    line_multi_book = _books_per_group(line_ids, books, n_lines) >= 2
+    line_first = line_order[line_starts]
+    picks = {}
+    for side, odds in odds_by_side.items():
+        best_pos = _pick_row_per_group(line_order, line_starts, odds, largest=True)
+        worst_pos = _pick_row_per_group(line_order, line_starts, odds, largest=False)
+        picks[side] = (best_pos, worst_pos, odds[best_pos] - odds[worst_pos])
+    odds_diffs = np.column_stack([picks['Over'][2], picks['Under'][2]]).ravel()
+    odds_mask = np.repeat(line_multi_book, 2) & (odds_diffs >= ODDS_DIFF_THRESHOLD)
 
+    odds_ops = []
+    for candidate in _top_k_positions(odds_diffs, odds_mask, top_n):
+        g, side = divmod(candidate, 2)
+        side = 'Under' if side else 'Over'
+        best_pos, worst_pos, diffs = picks[side]
+        odds = odds_by_side[side]
+        first = prop_first[prop_ids[line_first[g]]]
+        odds_ops.append({
+            'type': side,
+            'player_name': player_names[first],
+            'prop_type': prop_display(first),
+            'line': lines[line_first[g]],
+            'best_book': books[best_pos[g]],
+            'best_odds': int(odds[best_pos[g]]),
+            'worst_book': books[worst_pos[g]],
+            'worst_odds': int(odds[worst_pos[g]]),
+            'diff': int(diffs[g])
+        })
+
+    # --- Logic 2: Line Shopping (Different Lines, Same Prop) ---
+    prop_multi_book = _books_per_group(prop_ids, books, n_props) >= 2
+    max_line_pos = _pick_row_per_group(prop_order, prop_starts, lines, largest=True)
+    min_line_pos = _pick_row_per_group(prop_order, prop_starts, lines, largest=False)
+    line_diffs = lines[max_line_pos] - lines[min_line_pos]
+    thresholds = pd.Series(prop_mains[prop_first]).map(LINE_DIFF_THRESHOLDS).fillna(DEFAULT_LINE_THRESHOLD).to_numpy(dtype=float)
+    line_mask = prop_multi_book & (line_diffs > 0) & (line_diffs >= thresholds)
 
-def find_biggest_line_moves(props_df):
+    line_ops = []
+    for g in _top_k_positions(line_diffs, line_mask, top_n):
+        max_row, min_row = max_line_pos[g], min_line_pos[g]
+        line_ops.append({
+            'player_name': player_names[prop_first[g]],
+            'prop_type': prop_display(prop_first[g]),
+            'bet_over_book': books[min_row],
+            'bet_over_line': lines[min_row],
+            'bet_over_odds': format_odds(odds_by_side['Over'][min_row]),
+            'bet_under_book': books[max_row],
+            'bet_under_line': lines[max_row],
+            'bet_under_odds': format_odds(odds_by_side['Under'][max_row]),
+            'line_diff': line_diffs[g]
+        })
+
+    # Both lists come out sorted biggest first and cut to the top_n (25) for display
+    return {'odds_shopping': odds_ops, 'line_shopping': line_ops}
+
+
+def find_biggest_line_moves(props_df, top_n=25, return_table=False):
     """
     Finds the props with the largest line movement from their first recorded
     point to their last, grouped by player, prop, and sportsbook.
+
+    With return_table=True, also returns a DataFrame of every (player, prop, book)
+    with at least two data points, biggest move first, for export.
     """
+    empty_result = ([], pd.DataFrame()) if return_table else []
     if props_df is None or props_df.empty or 'scrape_timestamp' not in props_df.columns:
-        return []
+        return empty_result
 
-    df = props_df.copy()
-    
-    # Ensure timestamp is datetime for proper sorting
-    df['scrape_timestamp'] = pd.to_datetime(df['scrape_timestamp'])
-    
     # We group by the unique prop AND the sportsbook, as lines move
     # independently on different books.
-    grouped = df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier', 'sportsbook'])
-
+    group_keys = ['player_name_norm', 'prop_main', 'prop_qualifier', 'sportsbook']
+    df = props_df.dropna(subset=group_keys)
+    if df.empty:
+        return empty_result
+
+    # Timestamps are parsed once at load time; only parse here for frames that bypassed get_combined_data
+    timestamps = df['scrape_timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
+    ts_values = timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    ts_values = np.where(timestamps.isna().to_numpy(), np.iinfo(np.int64).max, ts_values) # NaT sorts last
+
+    # One global sort by (group, time), then the first and last row of each group are read off directly
+    group_ids = df.groupby(group_keys, sort=True, observed=True).ngroup().to_numpy()
+    order = np.lexsort((ts_values, group_ids))
+    starts = _group_starts(group_ids[order])
+    ends = np.r_[starts[1:], len(order)] - 1
+    start_pos, end_pos = order[starts], order[ends]
+    n_points = ends - starts + 1
+
+    lines = df['line'].to_numpy(dtype=float)
+    line_changes = lines[end_pos] - lines[start_pos]
+    abs_changes = np.abs(line_changes)
+    prop_mains = df['prop_main'].to_numpy()[start_pos]
+    # Use the same thresholds as the "middles" to find significant moves
+    thresholds = pd.Series(prop_mains).map(LINE_DIFF_THRESHOLDS).fillna(DEFAULT_LINE_THRESHOLD).to_numpy(dtype=float)
+    significant = (n_points >= 2) & (abs_changes >= thresholds) # Need at least two data points to show movement
+
+    player_names = df['player_name'].to_numpy()
+    player_norms = df['player_name_norm'].to_numpy()
+    prop_qualifiers = df['prop_qualifier'].to_numpy()
+    books = df['sportsbook'].to_numpy()
+    times = timestamps.to_numpy()
+
+    # Only the top_n biggest moves are materialized into dicts
     moves = []
-
-    for (player_norm, prop_main, prop_qual, sportsbook), group in grouped:
-        if len(group) < 2:
-            continue # Need at least two data points to show movement
-
-        # Sort by time to find the first and last entry
-        group = group.sort_values('scrape_timestamp')
-        
-        start_row = group.iloc[0]
-        end_row = group.iloc[-1]
-
-        start_line = start_row['line']
-        end_line = end_row['line']
-
-        line_change = end_line - start_line
-
-        # Use the same thresholds as the "middles" to find significant moves
-        threshold = LINE_DIFF_THRESHOLDS.get(prop_main, DEFAULT_LINE_THRESHOLD)
-
-        if abs(line_change) >= threshold:
-            player_name = start_row['player_name']
-            prop_display = f"{prop_main} ({prop_qual})" if prop_qual and prop_qual != 'Full Game' else prop_main
-
-            moves.append({
-                'player_name': player_name,
-                'prop_type': prop_display,
-                'sportsbook': sportsbook,
-                'start_line': start_line,
-                'end_line': end_line,
-                'line_change': line_change,
-                'start_time': start_row['scrape_timestamp'].strftime('%a, %b %d %I:%M%p'),
-                'end_time': end_row['scrape_timestamp'].strftime('%a, %b %d %I:%M%p'),
-                'abs_change': abs(line_change), # Helper for sorting
-                # (NEW) Add keys for history lookup
-                'player_name_norm': player_norm,
-                'prop_main': prop_main,
-                'prop_qualifier': prop_qual,
-            })
-
-    # Sort the final list by the largest absolute change
-    moves.sort(key=lambda x: x['abs_change'], reverse=True)
-    
-    # --- (MODIFIED) Return only the top 25 biggest moves ---
-    return moves[:25]
-
-
-def parse_prop_type(prop_string: str) -> dict:
-    prop_string = str(prop_string).strip()
-    if not prop_string:
-        return {'main': 'Unknown Prop', 'qualifier': ''}
-    
-    # --- THIS IS THE CORRECTED DICTIONARY ---
-    PROP_TYPE_MAP = {
-        # Passing Touchdowns
-        'Passing Touchdowns': 'Passing Touchdowns', 'Passing TDs': 'Passing Touchdowns', 'Pass TDs': 'Passing Touchdowns', 'TDs': 'Passing Touchdowns',
-        
-        # Passing Yards (FIXED)
-        'Passing Yards': 'Passing Yards', 'Passing Yds': 'Passing Yards', 'Pass Yds': 'Passing Yards', 'Pass Yards': 'Passing Yards', 'Yds': 'Passing Yards',
-        
-        # Passing Completions (FIXED)
-        'Passing Completions': 'Passing Completions', 'Completions': 'Passing Completions', 'Pass Completions': 'Passing Completions', 'Passing Completion': 'Passing Completions', 'Passing': 'Passing Completions',
-        
-        # Passing Attempts
-        'Passing Attempts': 'Passing Attempts', 'Pass Attempts': 'Passing Attempts',
-        
-        # Interceptions
-        'Interceptions Thrown': 'Interceptions Thrown', 'Interceptions': 'Interceptions Thrown', 'Interception': 'Interceptions Thrown',
-        
-        # Receiving Yards (FIXED)
-        'Receiving Yards': 'Receiving Yards', 'Receiving Yds': 'Receiving Yards', 'Rec Yards': 'Receiving Yards', 'Rec Yds': 'Receiving Yards',
-        
-        # Receptions
-        'Receptions': 'Receptions', 'Total Receptions': 'Receptions', 'Reception': 'Receptions',
-        
-        # Rushing Yards (FIXED)
-        'Rushing Yards': 'Rushing Yards', 'Rushing Yds': 'Rushing Yards', 'Rush Yards': 'Rushing Yards', 'Rush Yds': 'Rushing Yards',
-        
-        # Rushing Attempts
-        'Rushing Attempts': 'Rushing Attempts', 'Rush Attempts': 'Rushing Attempts',
-        
-        # Combo Props (Rushing + Receiving) (FIXED)
-        'Rushing + Receiving Yards': 'Rushing + Receiving Yards', 'Rushing + Receiving Yds': 'Rushing + Receiving Yards', 'Rush + Rec Yards': 'Rushing + Receiving Yards', 'Rush + Rec Yds': 'Rushing + Receiving Yards',
-        
-        # Combo Props (Passing + Rushing) (FIXED)
-        'Passing + Rushing Yards': 'Passing + Rushing Yards', 'Passing + Rushing Yds': 'Passing + Rushing Yards', 'Pass + Rush Yards': 'Passing + Rushing Yards',
-        
-        # Kicking
-        'Field Goals Made': 'Field Goals Made', 'FG Made': 'Field Goals Made',
-        'Kicking Points': 'Kicking Points', 'Kicking Pts': 'Kicking Points',
-        'Extra Points Made': 'Extra Points Made', 'PAT Made': 'Extra Points Made',
-        
-        # Fantasy
-        'Fantasy Points': 'Fantasy Points', 'WR/TE Fantasy Points': 'Fantasy Points', 'RB Fantasy Points': 'Fantasy Points', 'QB Fantasy Points': 'Fantasy Points',
-    }
-    # --- END OF CORRECTIONS ---
-    
-    qualifiers = { ' - 1st Half': '1st Half', ' - 1H': '1st Half', ' - 1st Quarter': '1st Quarter', ' - 1Q': '1st Quarter', '1st Qtr': '1st Quarter', 'Longest': 'Longest' }
-    prop_qualifier = 'Full Game'; main_prop_str = prop_string
-    if 'Longest' in main_prop_str:
-        prop_qualifier = 'Longest'; main_prop_str = main_prop_str.replace('Longest', '').strip()
-    else:
-        for key, val in qualifiers.items():
-            if key in main_prop_str:
-                prop_qualifier = val; main_prop_str = main_prop_str.replace(key, '').strip(); break
-    main_prop_str = main_prop_str.replace(' O/U', '').strip()
-    
-    # This line now correctly maps all variations to one canonical name
-    main_prop = PROP_TYPE_MAP.get(main_prop_str, main_prop_str) 
-    
-    if prop_qualifier == 'Longest':
-        if main_prop in ['Receiving Yards', 'Receptions']: main_prop = 'Longest Reception'
-        elif main_prop in ['Rushing Yards', 'Rush']: main_prop = 'Longest Rush'
-        elif main_prop in ['Passing Completions', 'Pass']: main_prop = 'Longest Completion'
-        prop_qualifier = ''
-    return {'main': main_prop, 'qualifier': prop_qualifier}
-
-def extract_player_name(text, known_players):
-    text = str(text)
-    best_match = ''
-    for player in sorted(known_players, key=len, reverse=True):
-        if text.lower().startswith(player.lower()):
-            best_match = player; break
-    return best_match if best_match else text
-
-def get_combined_data(week_number):
+    for g in _top_k_positions(abs_changes, significant, top_n):
+        start, end = start_pos[g], end_pos[g]
+        prop_main, prop_qual = prop_mains[g], prop_qualifiers[start]
+        prop_display = f"{prop_main} ({prop_qual})" if prop_qual and prop_qual != 'Full Game' else prop_main
+        moves.append({
+            'player_name': player_names[start],
+            'prop_type': prop_display,
+            'sportsbook': books[start],
+            'start_line': lines[start],
+            'end_line': lines[end],
+            'line_change': line_changes[g],
+            'start_time': pd.Timestamp(times[start]).strftime('%a, %b %d %I:%M%p'),
+            'end_time': pd.Timestamp(times[end]).strftime('%a, %b %d %I:%M%p'),
+            'abs_change': abs_changes[g], # Helper for sorting
+            # (NEW) Add keys for history lookup
+            'player_name_norm': player_norms[start],
+            'prop_main': prop_main,
+            'prop_qualifier': prop_qual,
+        })
+
+    if not return_table:
+        return moves
+
+    has_movement_data = n_points >= 2
+    moves_table = pd.DataFrame({
+        'player_name': player_names[start_pos],
+        'player_name_norm': player_norms[start_pos],
+        'prop_main': prop_mains,
+        'prop_qualifier': prop_qualifiers[start_pos],
+        'sportsbook': books[start_pos],
+        'start_line': lines[start_pos],
+        'end_line': lines[end_pos],
+        'line_change': line_changes,
+        'abs_change': abs_changes,
+        'threshold': thresholds,
+        'significant': significant,
+        'data_points': n_points,
+        'start_time': times[start_pos],
+        'end_time': times[end_pos],
+    })[has_movement_data]
+    moves_table = moves_table.sort_values('abs_change', ascending=False, kind='stable').reset_index(drop=True)
+    return moves, moves_table
+
+
+def parse_prop_columns(prop_types, player_names):
+    """
+    Parses prop_main/prop_qualifier for every row, but only runs the parser once per distinct
+    (prop_type, player_name) pair. Both results come back as categorical Series.
+    """
+    prop_codes, prop_uniques = pd.factorize(prop_types, use_na_sentinel=False)
+    player_codes, player_uniques = pd.factorize(player_names, use_na_sentinel=False)
+    n_players = max(len(player_uniques), 1)
+    pair_codes, pairs = pd.factorize(prop_codes.astype(np.int64) * n_players + player_codes)
+
+    mains = np.empty(len(pairs), dtype=object)
+    qualifiers = np.empty(len(pairs), dtype=object)
+    for i, pair in enumerate(pairs):
+        mains[i], qualifiers[i] = parse_player_prop(prop_uniques[pair // n_players], player_uniques[pair % n_players])
+
+    prop_main = pd.Series(pd.Categorical(mains[pair_codes]), index=prop_types.index)
+    prop_qualifier = pd.Series(pd.Categorical(qualifiers[pair_codes]), index=prop_types.index)
+    return prop_main, prop_qualifier
+
+def map_unique(series, func):
+    """Applies func once per distinct value of series (NaN included) and broadcasts the results back."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    results = np.empty(len(uniques), dtype=object)
+    results[:] = [func(value) for value in uniques]
+    return pd.Series(results[codes], index=series.index)
+
+# Raw columns the cleaning steps use; everything else (logos, the week, the book's own label) is never read from the store
+STORE_PROP_COLUMNS = ['game', 'player_name', 'team_name', 'prop_type', 'line', 'over_odds', 'under_odds', 'scrape_timestamp']
+
+def get_week_source_paths(week_number):
+    """
+    Resolves which FanDuel/DraftKings prop sources to load for a week. A Parquet odds store partition
+    (when pyarrow is installed and the week has been converted/scraped into it) wins, then history
+    CSVs (their compacted *_events.csv if there is one), then legacy CSVs. A store source is the
+    partition directory rather than a file.
+    """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(script_dir, '..', 'nfl_data')
-    week_folder = f'week_{week_number}'
-    
-    week_path = os.path.join(data_dir, week_folder)
+    week_path = os.path.join(data_dir, f'week_{week_number}')
 
-    if not os.path.isdir(data_dir):
-        return None, f"Error: Base data directory not found at '{os.path.abspath(data_dir)}'.", []
-    
-    if not os.path.isdir(week_path):
-         return None, f"Error: Week directory not found at '{os.path.abspath(week_path)}'.", []
+    # --- (NEW) Parquet odds store ---
+    store_root = os.path.join(data_dir, odds_store.STORE_DIR_NAME)
+    if odds_store.is_enabled(store_root):
+        fd_store_path = odds_store.find_partition(store_root, week_number, 'fanduel', 'props')
+        dk_store_path = odds_store.find_partition(store_root, week_number, 'draftkings', 'props')
+        if fd_store_path or dk_store_path:
+            return data_dir, week_path, fd_store_path, dk_store_path
 
     fd_history_path = os.path.join(week_path, f'fanduel_nfl_week_{week_number}_props_history.csv')
     dk_history_path = os.path.join(week_path, f'draftkings_nfl_week_{week_number}_props_history.csv')
+    # (NEW) A compacted history (change events only, see history_events.py) replaces the full one
+    if os.path.exists(history_events.events_path_for(fd_history_path)):
+        fd_history_path = history_events.events_path_for(fd_history_path)
+    if os.path.exists(history_events.events_path_for(dk_history_path)):
+        dk_history_path = history_events.events_path_for(dk_history_path)
     fd_legacy_path = os.path.join(week_path, f'fanduel_nfl_week_{week_number}_props.csv')
     dk_legacy_path = os.path.join(week_path, f'draftkings_nfl_week_{week_number}_props.csv')
 
@@ -369,21 +422,69 @@ def get_combined_data(week_number):
     elif os.path.exists(dk_legacy_path):
         draftkings_path_to_load = dk_legacy_path
 
-    fanduel_df = pd.read_csv(fanduel_path_to_load) if fanduel_path_to_load else pd.DataFrame()
-    draftkings_df = pd.read_csv(draftkings_path_to_load) if draftkings_path_to_load else pd.DataFrame()
-    
-    if fanduel_df.empty and draftkings_df.empty:
-        error_msg = f"No prop data files (e.g., ..._props.csv or ..._props_history.csv) found for Week {week_number} in '{os.path.abspath(week_path)}'."
-        return None, error_msg, []
-
-    if not fanduel_df.empty: fanduel_df['sportsbook'] = 'Fanduel'
+    return data_dir, week_path, fanduel_path_to_load, draftkings_path_to_load
+
+def get_source_fingerprint(paths):
+    """Returns a (path, mtime, size) tuple per existing source file. Any append by a scraper changes it."""
+    fingerprint = []
+    for path in paths:
+        if not path:
+            continue
+        if os.path.isdir(path): # Odds store partition: one entry per part file
+            fingerprint.extend(get_source_fingerprint(odds_store.partition_files(path)))
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+def get_week_fingerprint(week_number):
+    _, _, fanduel_path, draftkings_path = get_week_source_paths(week_number)
+    return get_source_fingerprint([fanduel_path, draftkings_path])
+
+def combine_raw_props(fanduel_df, draftkings_df):
+    """Stacks raw FanDuel and DraftKings rows under one column layout, tagging each row with its book."""
+    if not fanduel_df.empty: fanduel_df = fanduel_df.assign(sportsbook='Fanduel')
     if not draftkings_df.empty:
-        draftkings_df.rename(columns={'player': 'player_name'}, inplace=True)
-        draftkings_df['sportsbook'] = 'Draftkings'
+        draftkings_df = draftkings_df.rename(columns={'player': 'player_name'}).assign(sportsbook='Draftkings')
 
     props_df = pd.concat([fanduel_df, draftkings_df], ignore_index=True)
-    props_df.rename(columns={'over': 'over_odds', 'under': 'under_odds'}, inplace=True)
+    return props_df.rename(columns={'over': 'over_odds', 'under': 'under_odds'})
+
+def build_cleaning_context(fanduel_df):
+    """
+    Everything the cleaning steps derive from the full FanDuel frame: the known player names used to
+    resolve DraftKings names, the canonical spelling of each normalized name, and each player's team.
+    """
+    context = {'known_players': None, 'prefix_index': None, 'canonical_names': {}, 'player_teams': {}}
+    if fanduel_df.empty:
+        return context
+
+    context['known_players'] = set(fanduel_df['player_name'].dropna().unique())
+    context['prefix_index'] = build_player_prefix_index(context['known_players'])
+
+    fd_map_df = fanduel_df[['player_name']].dropna().copy()
+    fd_map_df['player_name_norm'] = map_unique(fd_map_df['player_name'], normalize_player_name)
+    context['canonical_names'] = fd_map_df.drop_duplicates('player_name_norm', keep='last').set_index('player_name_norm')['player_name'].to_dict()
+
+    if 'team_name' in fanduel_df.columns:
+        map_source_df = fanduel_df[['player_name', 'team_name']].dropna().copy()
+        map_source_df['player_name_norm'] = map_unique(map_source_df['player_name'], normalize_player_name)
+        map_source_df = map_source_df.drop_duplicates(subset=['player_name_norm'], keep='last')
+        context['player_teams'] = map_source_df.set_index('player_name_norm')['team_name'].to_dict()
+    return context
 
+def same_cleaning_context(a, b):
+    return all(a[key] == b[key] for key in ['known_players', 'canonical_names', 'player_teams'])
+
+def clean_props(props_df, context):
+    """
+    Runs the cleaning steps over combined raw rows (see combine_raw_props). Given the context every
+    step is row-local, so freshly appended rows can be cleaned on their own and concatenated.
+    """
+    props_df = props_df.copy()
     for col in ['over_odds', 'under_odds']:
         if col in props_df.columns:
             props_df[col] = pd.to_numeric(
@@ -391,93 +492,514 @@ def get_combined_data(week_number):
                 errors='coerce'
             )
 
-    if not fanduel_df.empty:
-        known_clean_players = set(fanduel_df['player_name'].dropna().unique())
-        props_df['player_name'] = props_df['player_name'].apply(
-            lambda name: extract_player_name(name, known_clean_players)
+    if context['known_players'] is not None:
+        known_clean_players, prefix_index = context['known_players'], context['prefix_index']
+        props_df['player_name'] = map_unique(
+            props_df['player_name'], lambda name: extract_player_name(name, known_clean_players, prefix_index)
         )
 
-    props_df['player_name_norm'] = props_df['player_name'].apply(normalize_player_name)
+    # Names, prop strings and games repeat on every scrape, so each is normalized once per distinct value
+    props_df['player_name_norm'] = map_unique(props_df['player_name'], normalize_player_name)
+    props_df['player_name'] = props_df['player_name_norm'].map(context['canonical_names']).fillna(props_df['player_name'])
 
-    canonical_name_map = {}
-    if not fanduel_df.empty:
-        fd_map_df = fanduel_df[['player_name']].dropna().copy()
-        fd_map_df['player_name_norm'] = fd_map_df['player_name'].apply(normalize_player_name)
-        canonical_name_map = fd_map_df.drop_duplicates('player_name_norm', keep='last').set_index('player_name_norm')['player_name'].to_dict()
+    props_df['prop_main'], props_df['prop_qualifier'] = parse_prop_columns(props_df['prop_type'], props_df['player_name'])
 
-    props_df['player_name'] = props_df['player_name_norm'].map(canonical_name_map).fillna(props_df['player_name'])
+    if 'team_name' not in props_df.columns:
+        props_df['team_name'] = ''
+    props_df['team_name'] = props_df['player_name_norm'].map(context['player_teams']).fillna(props_df.get('team_name', ''))
 
-    def get_prop_string_from_row(row):
-        prop_str = str(row['prop_type'])
-        player_str = str(row['player_name'])
-        if prop_str.lower().startswith(player_str.lower()):
-            return prop_str[len(player_str):].strip()
-        return prop_str
+    props_df.dropna(subset=['game', 'player_name', 'over_odds', 'under_odds', 'prop_main'], inplace=True)
 
-    clean_prop_strings = props_df.apply(get_prop_string_from_row, axis=1)
-    prop_details = clean_prop_strings.apply(parse_prop_type)
+    props_df['game_norm'] = map_unique(props_df['game'], lambda g: normalize_game_name(str(g), TEAM_MAP))
 
-    props_df['prop_main'] = prop_details.apply(lambda x: x['main'])
-    props_df['prop_qualifier'] = prop_details.apply(lambda x: x['qualifier'])
+    # Parse timestamps once here so the line-movement and history code never re-parse them
+    if 'scrape_timestamp' in props_df.columns:
+        props_df['scrape_timestamp'] = pd.to_datetime(props_df['scrape_timestamp'], format='ISO8601')
 
-    player_team_map = {}
-    if not fanduel_df.empty and 'team_name' in fanduel_df.columns:
-        map_source_df = fanduel_df[['player_name', 'team_name']].dropna().copy()
-        map_source_df['player_name_norm'] = map_source_df['player_name'].apply(normalize_player_name)
-        map_source_df = map_source_df.drop_duplicates(subset=['player_name_norm'], keep='last')
-        player_team_map = map_source_df.set_index('player_name_norm')['team_name'].to_dict()
+    props_df['grouping_team'] = props_df['team_name'].replace('', 'Unknown')
+    return props_df.reset_index(drop=True)
+
+def concat_props(frames):
+    """Concatenates cleaned frames, restoring the string and categorical dtypes that concat can widen."""
+    props_df = pd.concat(frames, ignore_index=True).infer_objects()
+    for col in ['prop_main', 'prop_qualifier']:
+        props_df[col] = props_df[col].astype('category')
+    return props_df
+
+def read_source_incremental(path, state=None):
+    """read_csv_incremental for a CSV source, or the store's equivalent (projected to STORE_PROP_COLUMNS) for a partition."""
+    if os.path.isdir(path):
+        return odds_store.read_partition_incremental(path, state, columns=STORE_PROP_COLUMNS)
+    return read_csv_incremental(path, state)
+
+def load_week_data(week_number, previous=None):
+    """
+    Loads and cleans a week's props. Returns (props_df, error_msg, sportsbooks, ingest_state).
 
-    if 'team_name' not in props_df.columns:
-        props_df['team_name'] = ''
-    props_df['team_name'] = props_df['player_name_norm'].map(player_team_map).fillna(props_df.get('team_name', ''))
+    When `previous` (the ingest_state of an earlier load of the same files) is given, only rows the
+    scrapers appended since then are parsed and cleaned; everything else is reused. If the FanDuel
+    names/teams the cleaning depends on changed, the cached raw rows are re-cleaned without re-reading
+    the files. A replaced or rewritten file is read again in full.
 
-    props_df.dropna(subset=['game', 'player_name', 'over_odds', 'under_odds', 'prop_main'], inplace=True)
+    ingest_state['board'] is the current board (see get_latest_props): one row per (player, prop,
+    qualifier, line, book, game). Appended rows are upserted into the previous board as they land.
+    """
+    data_dir, week_path, fanduel_path_to_load, draftkings_path_to_load = get_week_source_paths(week_number)
+
+    if not os.path.isdir(data_dir):
+        return None, f"Error: Base data directory not found at '{os.path.abspath(data_dir)}'.", [], None
+    
+    if not os.path.isdir(week_path):
+         return None, f"Error: Week directory not found at '{os.path.abspath(week_path)}'.", [], None
+
+    paths = {'fanduel': fanduel_path_to_load, 'draftkings': draftkings_path_to_load}
+    if previous is not None and previous['paths'] != paths:
+        previous = None # e.g. a history file appeared next to a legacy file
+
+    files, new_rows, any_reset = {}, {}, previous is None
+    for book, path in paths.items():
+        if not path:
+            files[book], new_rows[book] = None, pd.DataFrame()
+            continue
+        file_state, rows, reset = read_source_incremental(path, previous['files'][book]['state'] if previous else None)
+        if reset:
+            raw_df = rows
+        elif rows.empty:
+            raw_df = previous['files'][book]['raw']
+        else:
+            raw_df = pd.concat([previous['files'][book]['raw'], rows], ignore_index=True)
+        files[book] = {'state': file_state, 'raw': raw_df}
+        new_rows[book] = rows
+        any_reset = any_reset or reset
+
+    def raw(book):
+        return files[book]['raw'] if files[book] else pd.DataFrame()
+
+    fanduel_df, draftkings_df = raw('fanduel'), raw('draftkings')
+    if fanduel_df.empty and draftkings_df.empty:
+        error_msg = f"No prop data files (e.g., ..._props.csv or ..._props_history.csv) found for Week {week_number} in '{os.path.abspath(week_path)}'."
+        return None, error_msg, [], None
+
+    context = build_cleaning_context(fanduel_df)
 
-    props_df['game_norm'] = props_df['game'].astype(str).apply(lambda g: normalize_game_name(g, TEAM_MAP))
+    if any_reset or not same_cleaning_context(context, previous['context']):
+        props_df = clean_props(combine_raw_props(fanduel_df, draftkings_df), context)
+        cleaned = {'fanduel': props_df[props_df['sportsbook'] == 'Fanduel'],
+                   'draftkings': props_df[props_df['sportsbook'] == 'Draftkings']}
+        board = get_latest_props(props_df)
+    else:
+        # Only the appended rows go through cleaning; FanDuel rows stay ahead of DraftKings rows as in a full load
+        columns = combine_raw_props(fanduel_df.head(1), draftkings_df.head(1)).columns
+        cleaned = dict(previous['cleaned'])
+        landed = []
+        if not new_rows['fanduel'].empty:
+            appended = combine_raw_props(new_rows['fanduel'], pd.DataFrame()).reindex(columns=columns)
+            landed.append(clean_props(appended, context))
+            cleaned['fanduel'] = concat_props([cleaned['fanduel'], landed[-1]])
+        if not new_rows['draftkings'].empty:
+            appended = combine_raw_props(pd.DataFrame(), new_rows['draftkings']).reindex(columns=columns)
+            landed.append(clean_props(appended, context))
+            cleaned['draftkings'] = concat_props([cleaned['draftkings'], landed[-1]])
+        props_df = concat_props([cleaned['fanduel'], cleaned['draftkings']])
+
+        # (NEW) Upsert the freshly landed rows into the current board instead of re-deriving it from the full history
+        board = previous['board']
+        if landed:
+            board = get_latest_props(concat_props([board] + landed)) if 'scrape_timestamp' in props_df.columns else props_df
 
     sportsbooks = sorted(props_df['sportsbook'].unique())
-    props_df['grouping_team'] = props_df['team_name'].replace('', 'Unknown')
+    ingest_state = {'paths': paths, 'files': files, 'context': context, 'cleaned': cleaned, 'board': board}
+    return props_df, None, sportsbooks, ingest_state
+
+def get_combined_data(week_number):
+    props_df, error_msg, sportsbooks, _ = load_week_data(week_number)
+    return props_df, error_msg, sportsbooks
+
+
+def get_data_dir():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, '..', 'nfl_data')
+
+def get_snapshot_dir():
+    return os.path.join(get_data_dir(), week_snapshots.SNAPSHOT_DIR_NAME)
+
+def get_bundle_dir():
+    return os.path.join(get_data_dir(), analytics_bundle.BUNDLE_DIR_NAME)
+
+
+# --- Week Data Cache ---
+# Cleaned props per week, keyed by week number and invalidated by the source file fingerprint.
+# Entries are evicted least-recently-used once more than WEEK_CACHE_MAX_ENTRIES weeks are loaded.
+WEEK_CACHE_MAX_ENTRIES = 4
+_week_cache = OrderedDict()
+_week_cache_lock = threading.Lock()
+
+# (NEW) Single-flight loading: right after a scrape many requests miss the cache for the same week at
+# once. One of them loads (or builds an artifact), the others wait on its per-key lock and then find
+# the result in the cache. Time spent waiting is recorded per key for /api/cache/stats.
+_load_locks = {}
+_load_stats = defaultdict(lambda: {'acquisitions': 0, 'waits': 0, 'total_wait_ms': 0.0, 'max_wait_ms': 0.0})
+_load_locks_guard = threading.Lock()
+
+@contextmanager
+def single_flight(key):
+    """Holds the lock for `key` (e.g. ('week', 7)), recording how long this caller waited for it."""
+    with _load_locks_guard:
+        lock = _load_locks.setdefault(key, threading.Lock())
+    started = time.perf_counter()
+    contended = not lock.acquire(blocking=False)
+    if contended:
+        lock.acquire()
+    try:
+        waited_ms = (time.perf_counter() - started) * 1000
+        with _load_locks_guard:
+            stats = _load_stats[key]
+            stats['acquisitions'] += 1
+            if contended:
+                stats['waits'] += 1
+                stats['total_wait_ms'] += waited_ms
+                stats['max_wait_ms'] = max(stats['max_wait_ms'], waited_ms)
+        yield
+    finally:
+        lock.release()
+
+def get_load_stats():
+    """Per single-flight key ('week:7', 'week:7:analytics', ...): acquisitions and lock wait times."""
+    with _load_locks_guard:
+        return {':'.join(map(str, key)): {**stats, 'total_wait_ms': round(stats['total_wait_ms'], 1),
+                                         'max_wait_ms': round(stats['max_wait_ms'], 1)}
+                for key, stats in _load_stats.items()}
+
+def _lookup_week(week_number, fingerprint):
+    with _week_cache_lock:
+        entry = _week_cache.get(week_number)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            _week_cache.move_to_end(week_number)
+            return entry['props_df'], None, entry['sportsbooks']
+    return None
+
+def get_cached_combined_data(week_number):
+    """Same contract as get_combined_data, but repeat calls skip all CSV and pandas work while the source files are unchanged.
+
+    The returned DataFrame is shared between requests and must be treated as read-only (it may be a
+    view on a memory-mapped week snapshot, see week_snapshots.py).
+    """
+    fingerprint = get_week_fingerprint(week_number)
+    cached = _lookup_week(week_number, fingerprint)
+    if cached is not None:
+        return cached
+
+    with single_flight(('week', week_number)):
+        cached = _lookup_week(week_number, fingerprint) # Loaded by the request we waited for
+        if cached is not None:
+            return cached
+
+        previous_ingest = None
+        with _week_cache_lock:
+            entry = _week_cache.pop(week_number, None)
+            if entry is not None:
+                # A scraper appended; the cached frame is stale, but only the new rows need parsing
+                previous_ingest = entry['ingest'] # None for a mapped snapshot: the next change loads afresh
+
+        # (NEW) A snapshot written by the ingestion step for exactly these source files is mapped instead of loaded
+        snapshot = None
+        snapshot_dir = get_snapshot_dir()
+        if week_snapshots.is_enabled(snapshot_dir):
+            snapshot = week_snapshots.open_week_snapshot(snapshot_dir, week_number, fingerprint)
+
+        if snapshot is not None:
+            props_df, board_df, sportsbooks = snapshot
+            ingest_state = None
+        else:
+            props_df, error_msg, sportsbooks, ingest_state = load_week_data(week_number, previous_ingest)
+            if error_msg or props_df is None:
+                return props_df, error_msg, sportsbooks # Errors are never cached
+            board_df = ingest_state['board']
+
+        with _week_cache_lock:
+            _week_cache[week_number] = {'fingerprint': fingerprint, 'props_df': props_df, 'sportsbooks': sportsbooks,
+                                        'board': board_df, 'ingest': ingest_state, 'artifacts': {}}
+            _week_cache.move_to_end(week_number)
+            while len(_week_cache) > WEEK_CACHE_MAX_ENTRIES:
+                _week_cache.popitem(last=False)
 
     return props_df, None, sportsbooks
 
+def get_cached_board(week_number):
+    """
+    Returns (board_df, error_msg): the week's current board, maintained at ingestion time. This small
+    frame is all that arbitrage, value bets and the props grid need; the full history is only for
+    charts and line movement.
+    """
+    props_df, error_msg, _ = get_cached_combined_data(week_number)
+    if error_msg or props_df is None:
+        return None, error_msg
+    with _week_cache_lock:
+        entry = _week_cache.get(week_number)
+        if entry is not None and entry['props_df'] is props_df:
+            return entry['board'], None
+    return get_latest_props(props_df), None # Evicted in the meantime
+
+def get_cached_week_artifact(week_number, name, build):
+    """
+    Returns build(props_df) for the week's current data, building it at most once per data version.
+    Artifacts live on the week cache entry, so they are evicted and invalidated together with the frame.
+    """
+    props_df, error_msg, _ = get_cached_combined_data(week_number)
+    if error_msg or props_df is None:
+        return None, error_msg
+
+    def lookup():
+        with _week_cache_lock:
+            entry = _week_cache.get(week_number)
+            if entry is not None and entry['props_df'] is props_df and name in entry['artifacts']:
+                return entry['artifacts'][name]
+        return None
+
+    artifact = lookup()
+    if artifact is not None:
+        return artifact, None
+
+    with single_flight(('week', week_number, name)):
+        artifact = lookup() # Built by the request we waited for
+        if artifact is not None:
+            return artifact, None
+        artifact = build(props_df)
+        with _week_cache_lock:
+            entry = _week_cache.get(week_number)
+            if entry is not None and entry['props_df'] is props_df: # Don't attach to a newer data version
+                entry['artifacts'][name] = artifact
+    return artifact, None
+
+def clear_week_cache():
+    with _week_cache_lock:
+        _week_cache.clear()
+
+
+HISTORY_KEYS = ['player_name_norm', 'prop_main', 'prop_qualifier']
+HISTORY_COLS = ['scrape_timestamp', 'line', 'over_odds', 'under_odds', 'sportsbook']
+
+def build_history_index(props_df):
+    """
+    Indexes the week's history by (player_name_norm, prop_main, prop_qualifier).
+    Rows are stored contiguously per prop so a lookup is a dict hit plus a slice; JSON is serialized lazily per prop.
+    """
+    index = {'frame': pd.DataFrame(), 'slices': {}, 'json': {}}
+    if props_df is None or props_df.empty or 'scrape_timestamp' not in props_df.columns:
+        return index # Legacy weeks have no history
+
+    df = props_df.dropna(subset=HISTORY_KEYS)
+    if df.empty:
+        return index
+    group_ids = df.groupby(HISTORY_KEYS, sort=True, observed=True).ngroup().to_numpy()
+    order, starts = _sort_by_group(group_ids) # Stable, so rows keep their file order within a prop
+    stops = np.r_[starts[1:], len(order)]
+
+    valid_history_cols = [col for col in HISTORY_COLS if col in df.columns]
+    index['frame'] = df[valid_history_cols].iloc[order].reset_index(drop=True)
+    key_columns = [df[col].to_numpy()[order[starts]] for col in HISTORY_KEYS]
+    index['slices'] = {key: (start, stop) for key, start, stop in zip(zip(*key_columns), starts, stops)}
+    return index
+
+def get_history_json(history_index, player_norm, prop_main, prop_qualifier):
+    """JSON records of one prop's history across all books, or '[]' if the prop has none."""
+    key = (player_norm, prop_main, prop_qualifier)
+    history_json = history_index['json'].get(key)
+    if history_json is None:
+        bounds = history_index['slices'].get(key)
+        if bounds is None:
+            return '[]'
+        history_json = history_index['frame'].iloc[bounds[0]:bounds[1]].to_json(orient='records', date_format='iso')
+        history_index['json'][key] = history_json
+    return history_json
+
+
+# --- (NEW) Inverted props index ---
+# Per week and data version: player-name tokens, prop_main and sportsbook each map to the sorted ids of
+# the board rows holding them, so a filtered search intersects a few small arrays instead of scanning.
+PROPS_PAGE_SIZE = 50
+PROPS_MAX_PAGE_SIZE = 500
+PROPS_SORT_KEYS = ['game_norm', 'player_name', 'prop_main', 'prop_qualifier', 'sportsbook', 'line']
+_PLAYER_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+_NO_ROWS = np.array([], dtype=np.int64)
+
+def player_tokens(name):
+    return _PLAYER_TOKEN_PATTERN.findall(normalize_player_name(name or ''))
+
+def build_props_index(board_df):
+    """
+    Indexes a week's board. Tokens are kept sorted, so a partly typed name ("mah") finds every token it
+    prefixes by bisection; prop and book keys are lower-cased.
+    """
+    index = {'frame': pd.DataFrame(columns=LATEST_COLS), 'tokens': [], 'token_rows': [], 'props': {}, 'books': {}}
+    if board_df is None or board_df.empty:
+        return index
+
+    sort_keys = [col for col in PROPS_SORT_KEYS if col in board_df.columns]
+    frame = board_df[[col for col in LATEST_COLS if col in board_df.columns]] \
+        .sort_values(sort_keys, kind='stable').reset_index(drop=True)
+
+    token_rows = defaultdict(list)
+    for player_norm, rows in frame.groupby('player_name_norm', observed=True).indices.items():
+        for token in set(player_tokens(player_norm)):
+            token_rows[token].append(rows)
+    index['tokens'] = sorted(token_rows)
+    index['token_rows'] = [np.unique(np.concatenate(token_rows[token])) for token in index['tokens']]
+    index['props'] = {str(key).lower(): rows for key, rows in frame.groupby('prop_main', observed=True).indices.items()}
+    index['books'] = {str(key).lower(): rows for key, rows in frame.groupby('sportsbook', observed=True).indices.items()}
+    index['frame'] = frame
+    return index
+
+def query_props_index(index, player='', prop='', book=''):
+    """Sorted ids of the rows matching all given filters; every token of `player` must prefix a name token."""
+    row_ids = None
+    def narrow(rows):
+        return rows if row_ids is None else np.intersect1d(row_ids, rows, assume_unique=True)
+
+    tokens = index['tokens']
+    for token in player_tokens(player):
+        start, stop = bisect_left(tokens, token), bisect_left(tokens, token + '\uffff')
+        matches = index['token_rows'][start:stop]
+        row_ids = narrow(np.unique(np.concatenate(matches)) if matches else _NO_ROWS)
+    if prop:
+        row_ids = narrow(index['props'].get(prop.strip().lower(), _NO_ROWS))
+    if book:
+        row_ids = narrow(index['books'].get(book.strip().lower(), _NO_ROWS))
+    return np.arange(len(index['frame'])) if row_ids is None else row_ids
+
+def get_props_index(week_number):
+    def build(_):
+        board_df, _ = get_cached_board(week_number)
+        return build_props_index(board_df)
+    return get_cached_week_artifact(week_number, 'props_index', build)
+
+
+# --- (NEW) SQLite odds history ---
+# Once nfl_data/odds_history.sqlite3 exists (python odds_db.py), the JSON APIs answer history,
+# latest-snapshot and line-move queries from its indexes; otherwise they fall back to the week cache.
+LATEST_COLS = ['player_name', 'player_name_norm', 'team_name', 'game', 'game_norm', 'prop_type', 'prop_main',
+               'prop_qualifier', 'sportsbook', 'line', 'over_odds', 'under_odds', 'scrape_timestamp']
+
+def get_odds_db_path():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, '..', 'nfl_data', odds_db.DB_FILE_NAME)
+
+def open_odds_db(week_number=None):
+    """A connection to the odds history database if it is set up (and holds week_number), else None."""
+    db_path = get_odds_db_path()
+    if not odds_db.is_enabled(db_path):
+        return None
+    conn = odds_db.connect(db_path)
+    if week_number is not None and not odds_db.has_week(conn, week_number):
+        conn.close()
+        return None
+    return conn
+
+def records_json(df):
+    """JSON records with timestamps in the same ISO format whether df came from SQL or the week cache."""
+    if 'scrape_timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['scrape_timestamp']):
+        df = df.assign(scrape_timestamp=pd.to_datetime(df['scrape_timestamp'], format='ISO8601'))
+    return df.to_json(orient='records', date_format='iso')
+
+def format_line_moves(moves_df, top_n=25):
+    """Builds find_biggest_line_moves' result from a table of first/last points (see odds_db.query_line_moves)."""
+    if moves_df.empty:
+        return []
+    lines = moves_df[['start_line', 'end_line']].to_numpy(dtype=float)
+    line_changes = lines[:, 1] - lines[:, 0]
+    abs_changes = np.abs(line_changes)
+    thresholds = moves_df['prop_main'].map(LINE_DIFF_THRESHOLDS).fillna(DEFAULT_LINE_THRESHOLD).to_numpy(dtype=float)
+    start_times = pd.to_datetime(moves_df['start_time'], format='ISO8601')
+    end_times = pd.to_datetime(moves_df['end_time'], format='ISO8601')
+
+    moves = []
+    for g in _top_k_positions(abs_changes, abs_changes >= thresholds, top_n):
+        row = moves_df.iloc[g]
+        prop_qual = row['prop_qualifier']
+        moves.append({
+            'player_name': row['player_name'],
+            'prop_type': f"{row['prop_main']} ({prop_qual})" if prop_qual and prop_qual != 'Full Game' else row['prop_main'],
+            'sportsbook': row['sportsbook'],
+            'start_line': lines[g, 0],
+            'end_line': lines[g, 1],
+            'line_change': line_changes[g],
+            'start_time': start_times.iloc[g].strftime('%a, %b %d %I:%M%p'),
+            'end_time': end_times.iloc[g].strftime('%a, %b %d %I:%M%p'),
+            'abs_change': abs_changes[g],
+            'player_name_norm': row['player_name_norm'],
+            'prop_main': row['prop_main'],
+            'prop_qualifier': prop_qual,
+        })
+    return moves
+
+
+def format_odds_column(odds):
+    """Vectorized format_odds for a whole column of odds; returns a list of display strings."""
+    odds = pd.Series(odds).reset_index(drop=True)
+    numeric = pd.to_numeric(odds, errors='coerce')
+    valid = numeric.notna().to_numpy()
+    formatted = np.empty(len(odds), dtype=object)
+    ints = numeric[valid].to_numpy().astype(np.int64)
+    digits = ints.astype(str).astype(object)
+    formatted[valid] = np.where(ints > 0, '+' + digits, digits)
+    formatted[~valid] = [format_odds(value) for value in odds[~valid]]
+    return formatted.tolist()
+
+def team_logo_url(team):
+    team_logo_slug = FANDUEL_LOGO_MAP.get(team, '') if team != 'Unknown' else ''
+    return f"https://assets.sportsbook.fanduel.com/images/team/nfl/{team_logo_slug}.png" if team_logo_slug else ''
+
+def get_latest_props(props_df):
+    """Latest snapshot of each (player, prop, qualifier, line, book, game). Legacy frames are already the latest."""
+    if props_df is None or props_df.empty or 'scrape_timestamp' not in props_df.columns:
+        return props_df
+    group_keys = ['player_name_norm', 'prop_main', 'prop_qualifier', 'line', 'sportsbook', 'game_norm']
+    return props_df.sort_values('scrape_timestamp') \
+                   .groupby(group_keys, observed=True) \
+                   .last() \
+                   .reset_index()
+
+def structure_props_for_template(props_df):
+    """
+    Takes a DataFrame of props and structures it into a nested dict for the template
+    (game -> team -> player -> prop -> qualifier -> book). History is fetched lazily by the page.
 
-def structure_props_for_template(props_df, history_map): # MODIFIED SIGNATURE
-    """Takes a DataFrame of props and structures it into a nested dict for the template."""
+    Built with one stable sort by the grouping keys and a single pass over plain column lists.
+    """
     output_structure = defaultdict(lambda: {'game_lines': None, 'teams': {}})
     if props_df is None or props_df.empty:
         return output_structure
 
-    grouped = props_df.groupby(['game_norm', 'grouping_team', 'player_name', 'prop_main', 'prop_qualifier', 'player_name_norm'])
-
-    for (game, team, player, prop_main, prop_qualifier, player_norm), group in grouped: # ADDED player_norm
-        if not all([game, player]): continue
+    group_keys = ['game_norm', 'grouping_team', 'player_name', 'prop_main', 'prop_qualifier', 'player_name_norm']
+    df = props_df.dropna(subset=group_keys)
+    if df.empty:
+        return output_structure
+    group_ids = df.groupby(group_keys, sort=True, observed=True).ngroup().to_numpy()
+    order = np.argsort(group_ids, kind='stable') # Rows stay in file order within a group, like iterrows did
+
+    columns = [group_ids[order].tolist()]
+    columns += [df[col].to_numpy()[order].tolist() for col in group_keys + ['sportsbook', 'line']]
+    columns += [format_odds_column(df['over_odds'].to_numpy()[order]), format_odds_column(df['under_odds'].to_numpy()[order])]
+
+    current_group = -1
+    market_data = None
+    for group_id, game, team, player, prop_main, prop_qualifier, player_norm, book, line, over, under in zip(*columns):
+        if group_id != current_group:
+            current_group = group_id
+            if not all([game, player]):
+                market_data = None
+                continue
 
-        team_logo_url = ''
-        if team != 'Unknown':
-            team_logo_slug = FANDUEL_LOGO_MAP.get(team, '')
-            if team_logo_slug:
-                team_logo_url = f"https://assets.sportsbook.fanduel.com/images/team/nfl/{team_logo_slug}.png"
+            teams = output_structure[game]['teams']
+            if team not in teams:
+                teams[team] = {'logo': team_logo_url(team), 'players': {}}
+            # 'norm' is the key the page uses to request this player's history from the history API
+            player_props = teams[team]['players'].setdefault(player, {'props': {}, 'norm': player_norm})
+            market_data = {}
+            player_props['props'].setdefault(prop_main, {})[prop_qualifier] = market_data
 
-        if team not in output_structure[game]['teams']:
-            output_structure[game]['teams'][team] = {'logo': team_logo_url, 'players': {}}
-        player_props = output_structure[game]['teams'][team]['players'].setdefault(player, {'props': {}})
-        
-        prop_history_json = history_map.get((player_norm, prop_main, prop_qualifier), '[]') # Default to empty JSON array
-        
-        market_data = {}
-        for _, row in group.iterrows():
-            def format_odds(odds):
-                try: return f"+{int(odds)}" if int(odds) > 0 else str(int(odds));
-                except: return str(odds)
-            
-            market_data[row['sportsbook']] = {
-                'line': row['line'], 
-                'over': format_odds(row['over_odds']), 
-                'under': format_odds(row['under_odds']),
-                'history': prop_history_json # Attach the SAME history JSON to all books for this prop
-            }
-        
-        player_props['props'].setdefault(prop_main, {})[prop_qualifier] = market_data
+        if market_data is not None:
+            market_data[book] = {'line': line, 'over': over, 'under': under}
 
     for game_name, data in output_structure.items():
         if 'Unknown' in data['teams']: data['teams']['Players'] = data['teams'].pop('Unknown')
@@ -485,6 +1007,56 @@ def structure_props_for_template(props_df, history_map): # MODIFIED SIGNATURE
     return output_structure
 
 
+def get_template_structure(week_number):
+    """The props grid for a week's latest data, built once per data version and shared from the week cache."""
+    def build(_):
+        board_df, _ = get_cached_board(week_number)
+        return structure_props_for_template(board_df)
+    return get_cached_week_artifact(week_number, 'template_structure', build)[0]
+
+def build_board_payload(final_data, sportsbooks):
+    """
+    The props grid as compact columnar JSON for the page's virtualized board. There is one row per
+    (game, team, player, prop, qualifier), in the order the grid shows them. Names are indexes into
+    the string tables, and there are per-book line/over/under columns (null where a book has no market).
+    """
+    strings = {'game': [], 'team': [], 'player': [], 'prop': [], 'qualifier': []}
+    string_ids = {name: {} for name in strings}
+    rows = {name: [] for name in strings}
+    values = {name: [[] for _ in sportsbooks] for name in ['line', 'over', 'under']}
+    player_norms, game_logos = [], []
+
+    def intern(name, value):
+        index = string_ids[name].get(value)
+        if index is None:
+            index = string_ids[name][value] = len(strings[name])
+            strings[name].append(value)
+        return index
+
+    for game, game_data in sorted(final_data.items(), key=lambda item: item[0]):
+        game_id = intern('game', game)
+        if game_id == len(game_logos): # The sidebar shows the first two teams' logos
+            game_logos.append([team_data['logo'] for team_data in game_data['teams'].values()][:2])
+        for team, team_data in sorted(game_data['teams'].items(), key=lambda item: item[0]):
+            for player, player_data in sorted(team_data['players'].items(), key=lambda item: item[0]):
+                player_id = intern('player', player)
+                if player_id == len(player_norms):
+                    player_norms.append(player_data['norm'])
+                for prop_main, qualifiers in sorted(player_data['props'].items(), key=lambda item: item[0]):
+                    for qualifier, market_data in sorted(qualifiers.items(), key=lambda item: item[0]):
+                        for name, value in zip(strings, [game, team, player, prop_main, qualifier]):
+                            rows[name].append(intern(name, value))
+                        for book_index, book in enumerate(sportsbooks):
+                            market = market_data.get(book)
+                            line = market['line'] if market else None
+                            values['line'][book_index].append(None if line is None or pd.isna(line) else float(line))
+                            values['over'][book_index].append(market['over'] if market else None)
+                            values['under'][book_index].append(market['under'] if market else None)
+
+    return {'books': list(sportsbooks), 'strings': strings, 'player_norms': player_norms,
+            'game_logos': game_logos, 'rows': {**rows, **values}}
+
+
 @app.route('/')
 def index():
     """Redirects to the page for the most recent week."""
@@ -492,47 +1064,35 @@ def index():
     data_dir = os.path.join(script_dir, '..', 'nfl_data')
     available_weeks = get_available_weeks(data_dir)
     if not available_weeks:
-        return render_template('index.html', error_msg="No weekly data found in the 'nfl_data' directory.", final_data={}, available_weeks=[], sportsbooks=[])
+        return render_template('index.html', error_msg="No weekly data found in the 'nfl_data' directory.", available_weeks=[], sportsbooks=[])
     latest_week = available_weeks[0]
     return redirect(url_for('show_week', week_num=latest_week))
 
 
-@app.route('/week/<int:week_num>')
-def show_week(week_num):
-    """Displays the dashboard for a specific week."""
-    player_search = request.args.get('player_search', '').strip()
-    prop_filter = request.args.get('prop_filter', '').strip()
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, '..', 'nfl_data')
-    available_weeks = get_available_weeks(data_dir)
-    if week_num not in available_weeks:
-        return redirect(url_for('index'))
-
-    # Get all raw data (could be history or legacy)
-    raw_historical_df, error_msg, sportsbooks = get_combined_data(week_num)
+def compute_week_analytics(week_number):
+    """
+    Everything the week page shows besides the week list: returns (analytics, error_msg, timings_ms),
+    with the time each step took. Published as a bundle by analytics_bundle.py, or computed inline.
+    """
+    timings_ms = {}
+    started = step_started = time.perf_counter()
+    def lap(name):
+        nonlocal step_started
+        now = time.perf_counter()
+        timings_ms[name] = round((now - step_started) * 1000, 1)
+        step_started = now
+
+    # Get all raw data (could be history or legacy). Served from the week cache when the files are unchanged.
+    raw_historical_df, error_msg, sportsbooks = get_cached_combined_data(week_number)
+    lap('load')
+    if error_msg or raw_historical_df is None or raw_historical_df.empty:
+        return None, error_msg or "No data available for this week.", timings_ms
 
     # (NEW) Initialize biggest_moves
     biggest_moves = []
 
-    # Handle errors or no data
-    if error_msg or raw_historical_df is None or raw_historical_df.empty:
-         return render_template('index.html',
-                           final_data={},
-                           error_msg=error_msg or "No data available for this week.",
-                           week_number=str(week_num),
-                           arbitrage_ops=[],
-                           value_bets={'odds_shopping': [], 'line_shopping': []},
-                           biggest_moves=biggest_moves, # ADDED
-                           sportsbooks=[],
-                           available_weeks=available_weeks,
-                           current_week=week_num,
-                           prop_types=[],
-                           player_search=player_search,
-                           prop_filter=prop_filter)
-
     # --- MODIFIED: Handle both history and legacy files ---
-    history_map = {}
+    # Prop history is no longer embedded in the page; the chart button fetches it from week_history_api.
     latest_props_df = None
 
     if 'scrape_timestamp' in raw_historical_df.columns:
@@ -540,33 +1100,14 @@ def show_week(week_num):
         
         # (NEW) Find biggest line moves using the FULL history
         biggest_moves = find_biggest_line_moves(raw_historical_df)
+        lap('biggest_moves')
 
-        # 1. Pre-process history map
-        raw_historical_df['scrape_timestamp'] = pd.to_datetime(raw_historical_df['scrape_timestamp'])
-        history_cols = ['scrape_timestamp', 'line', 'over_odds', 'under_odds', 'sportsbook']
-        valid_history_cols = [col for col in history_cols if col in raw_historical_df.columns]
-        history_groups = raw_historical_df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier'])
-        
-        for (player_norm, prop_main, prop_qual), group in history_groups:
-            history_json = group[valid_history_cols].to_json(orient='records', date_format='iso')
-            history_map[(player_norm, prop_main, prop_qual)] = history_json
-
-        # (NEW) Inject history JSON into biggest_moves
-        for move in biggest_moves:
-            history_key = (move['player_name_norm'], move['prop_main'], move['prop_qualifier'])
-            move['history_json'] = history_map.get(history_key, '[]')
-
-        # 2. Filter to get ONLY the latest props
-        group_keys = ['player_name_norm', 'prop_main', 'prop_qualifier', 'line', 'sportsbook', 'game_norm']
-        latest_props_df = raw_historical_df.sort_values('scrape_timestamp') \
-                                           .groupby(group_keys) \
-                                           .last() \
-                                           .reset_index()
+        # ONLY the latest props: the current board, maintained as the scrapes are ingested
+        latest_props_df, _ = get_cached_board(week_number)
     else:
         # --- B) FALLBACK LOGIC: File is legacy (Week 6) ---
-        # The raw data *is* the latest data, and history map remains empty.
+        # The raw data *is* the latest data, and there is no history to chart.
         latest_props_df = raw_historical_df
-        # history_map is already {}
         # biggest_moves is already []
         
     # --- END MODIFICATION ---
@@ -576,27 +1117,344 @@ def show_week(week_num):
 
     # 2. Find arbitrage opportunities on the latest dataset
     arbitrage_ops = find_arbitrage_opportunities(latest_props_df)
+    lap('arbitrage')
 
     # 3. Find value bets / line discrepancies
     value_bets = find_value_bets(latest_props_df)
+    lap('value_bets')
+
+    # 4. Structure the LATEST data for the template (cached alongside the week data)
+    final_data = get_template_structure(week_number)
+    lap('template_structure')
+    timings_ms['total'] = round((time.perf_counter() - started) * 1000, 1)
+
+    analytics = {
+        'final_data': final_data,
+        'arbitrage_ops': arbitrage_ops,
+        'value_bets': value_bets,
+        'biggest_moves': biggest_moves,
+        'sportsbooks': sportsbooks,
+        'prop_types': prop_types,
+    }
+    return analytics, None, timings_ms
+
+def get_cached_week_analytics(week_number):
+    """compute_week_analytics once per data version; concurrent requests for the week share the result."""
+    result, error_msg = get_cached_week_artifact(week_number, 'analytics', lambda _: compute_week_analytics(week_number))
+    if error_msg or result is None:
+        return None, error_msg or "No data available for this week.", {}
+    return result
+
+def get_published_analytics(week_number):
+    """The week's analytics from its published bundle, or None if bundles are off or it is out of date."""
+    bundle_dir = get_bundle_dir()
+    if not analytics_bundle.is_enabled(bundle_dir):
+        return None
+    bundle = analytics_bundle.read_bundle(bundle_dir, week_number)
+    if not analytics_bundle.is_current(bundle, get_week_fingerprint(week_number)):
+        return None
+    return bundle['analytics']
+
+
+# --- (NEW) Conditional and compressed /week responses ---
+# A week page only changes when its source files, the week list, the query or the template change, so
+# those make up its ETag. A browser revalidating an unchanged page gets a 304 before any pandas or Jinja
+# work, and each rendered page is kept per ETag and encoding so repeat visits skip rendering/compressing.
+PAGE_CACHE_MAX_ENTRIES = 16
+PAGE_ENCODINGS = ['gzip', 'deflate']
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+def week_page_validators(week_number, *key_parts, template='index.html'):
+    """
+    Returns (etag, last_modified) for a response built from a week's data, or (None, None) if the week
+    has no source files. key_parts (query values etc.) and the template's mtime go into the ETag.
+    """
+    fingerprint = get_week_fingerprint(week_number)
+    if not fingerprint:
+        return None, None
+    template_mtime_ns = os.stat(os.path.join(app.root_path, app.template_folder, template)).st_mtime_ns if template else 0
+    page_key = repr((fingerprint, template_mtime_ns) + key_parts)
+    etag = hashlib.sha1(page_key.encode('utf-8')).hexdigest()
+    newest_ns = max([item[1] for item in fingerprint] + [template_mtime_ns])
+    return etag, datetime.fromtimestamp(newest_ns // 10**9, tz=timezone.utc)
+
+def is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+def encode_page(html, encoding):
+    data = html.encode('utf-8')
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(data, 6)
+    return data
+
+def get_cached_page(etag, encoding):
+    with _page_cache_lock:
+        body = _page_cache.get((etag, encoding))
+        if body is not None:
+            _page_cache.move_to_end((etag, encoding))
+        return body
+
+def _store_page(etag, encoding, body):
+    with _page_cache_lock:
+        _page_cache[(etag, encoding)] = body
+        _page_cache.move_to_end((etag, encoding))
+        while len(_page_cache) > PAGE_CACHE_MAX_ENTRIES:
+            _page_cache.popitem(last=False)
+
+def get_page_body(etag, encoding, render):
+    """The page body for (etag, encoding), rendering and compressing it only on the first request."""
+    body = get_cached_page(etag, encoding)
+    if body is None:
+        html_body = get_cached_page(etag, 'identity')
+        if html_body is None:
+            html_body = encode_page(render(), 'identity')
+            _store_page(etag, 'identity', html_body)
+        body = html_body if encoding == 'identity' else encode_page(html_body.decode('utf-8'), encoding)
+        _store_page(etag, encoding, body)
+    return body
+
+def page_response(body, etag, last_modified, encoding='identity', status=200, mimetype='text/html'):
+    response = app.response_class(body, status=status, mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag, weak=True) # Weak: the gzip, deflate and plain bodies are the same page
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True # Browsers revalidate on every visit, which is a cheap 304
+    return response
+
 
-    # 4. Structure the LATEST data for the template, passing the (possibly empty) history map
-    final_data = structure_props_for_template(latest_props_df, history_map)
+@app.route('/week/<int:week_num>')
+def show_week(week_num):
+    """Displays the dashboard for a specific week."""
+    player_search = request.args.get('player_search', '').strip()
+    prop_filter = request.args.get('prop_filter', '').strip()
 
-    return render_template('index.html',
-                           final_data=final_data,
-                           error_msg=None,
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(script_dir, '..', 'nfl_data')
+    available_weeks = get_available_weeks(data_dir)
+    if week_num not in available_weeks:
+        return redirect(url_for('index'))
+
+    # (NEW) Unchanged page: 304, or the cached (compressed) body, without loading anything
+    etag, last_modified = week_page_validators(week_num, available_weeks, player_search, prop_filter)
+    if etag and is_not_modified(etag, last_modified):
+        return page_response(b'', etag, last_modified, status=304)
+    encoding = request.accept_encodings.best_match(PAGE_ENCODINGS) or 'identity'
+    html_body = get_cached_page(etag, 'identity') if etag else None
+    if html_body is not None: # Rendered before: at most a compression away
+        body = get_page_body(etag, encoding, lambda: html_body.decode('utf-8'))
+        return page_response(body, etag, last_modified, encoding)
+
+    # (NEW) Precomputed by the analytics worker; computed here only until it has caught up with a scrape
+    analytics = get_published_analytics(week_num)
+    error_msg = None
+    if analytics is None:
+        analytics, error_msg, _ = get_cached_week_analytics(week_num)
+
+    # Handle errors or no data
+    if error_msg:
+         return render_template('index.html',
+                           error_msg=error_msg,
                            week_number=str(week_num),
-                           arbitrage_ops=arbitrage_ops,
-                           value_bets=value_bets,
-                           biggest_moves=biggest_moves, # ADDED
-                           sportsbooks=sportsbooks,
+                           arbitrage_ops=[],
+                           value_bets={'odds_shopping': [], 'line_shopping': []},
+                           biggest_moves=[], # ADDED
+                           sportsbooks=[],
                            available_weeks=available_weeks,
                            current_week=week_num,
-                           prop_types=prop_types,
+                           prop_types=[],
                            player_search=player_search,
                            prop_filter=prop_filter)
 
+    def render():
+        return render_template('index.html',
+                               error_msg=None,
+                               week_number=str(week_num),
+                               arbitrage_ops=analytics['arbitrage_ops'],
+                               value_bets=analytics['value_bets'],
+                               biggest_moves=analytics['biggest_moves'], # ADDED
+                               sportsbooks=analytics['sportsbooks'],
+                               available_weeks=available_weeks,
+                               current_week=week_num,
+                               prop_types=analytics['prop_types'],
+                               player_search=player_search,
+                               prop_filter=prop_filter)
+    if not etag:
+        return render()
+    return page_response(get_page_body(etag, encoding, render), etag, last_modified, encoding)
+
+
+@app.route('/api/week/<int:week_num>/board')
+def week_board_api(week_num):
+    """(NEW) The week's props grid as columnar JSON (see build_board_payload), with the same caching as the page."""
+    etag, last_modified = week_page_validators(week_num, 'board', template=None)
+    if etag is None:
+        return jsonify({'error': f"No data available for Week {week_num}."}), 404
+    if is_not_modified(etag, last_modified):
+        return page_response(b'', etag, last_modified, status=304, mimetype='application/json')
+    encoding = request.accept_encodings.best_match(PAGE_ENCODINGS) or 'identity'
+
+    json_body = get_cached_page(etag, 'identity')
+    if json_body is None:
+        analytics = get_published_analytics(week_num)
+        if analytics is None:
+            analytics, error_msg, _ = get_cached_week_analytics(week_num)
+            if error_msg:
+                return jsonify({'error': error_msg}), 404
+        payload = build_board_payload(analytics['final_data'], analytics['sportsbooks'])
+        board_json = json.dumps(payload, separators=(',', ':'))
+    else:
+        board_json = json_body.decode('utf-8')
+    body = get_page_body(etag, encoding, lambda: board_json)
+    return page_response(body, etag, last_modified, encoding, mimetype='application/json')
+
+
+@app.route('/api/week/<int:week_num>/history')
+def week_history_api(week_num):
+    """Returns the full history of one prop (all books) as JSON records, for the history chart."""
+    player_norm = request.args.get('player', '')
+    prop_main = request.args.get('prop', '')
+    prop_qualifier = request.args.get('qualifier', '')
+
+    conn = open_odds_db(week_num)
+    if conn is not None:
+        try:
+            history_df = odds_db.query_history(conn, player_norm, prop_main, prop_qualifier, week=week_num)
+        finally:
+            conn.close()
+        return app.response_class(records_json(history_df[HISTORY_COLS]), mimetype='application/json')
+
+    history_index, error_msg = get_cached_week_artifact(week_num, 'history_index', build_history_index)
+    if error_msg or history_index is None:
+        return jsonify({'error': error_msg or f"No data available for Week {week_num}."}), 404
+
+    history_json = get_history_json(history_index, player_norm, prop_main, prop_qualifier)
+    return app.response_class(history_json, mimetype='application/json')
+
+
+@app.route('/api/history')
+def history_api():
+    """(NEW) One prop's history across every week, from the odds history database."""
+    conn = open_odds_db()
+    if conn is None:
+        return jsonify({'error': "The odds history database is not set up (run odds_db.py)."}), 404
+    try:
+        history_df = odds_db.query_history(
+            conn, request.args.get('player', ''), request.args.get('prop', ''), request.args.get('qualifier', '')
+        )
+    finally:
+        conn.close()
+    return app.response_class(records_json(history_df), mimetype='application/json')
+
+
+@app.route('/api/week/<int:week_num>/latest')
+def week_latest_api(week_num):
+    """(NEW) The latest snapshot of the week's props (optionally one player's) as JSON records."""
+    player_norm = request.args.get('player') or None
+
+    conn = open_odds_db(week_num)
+    if conn is not None:
+        try:
+            latest_df = odds_db.query_latest_snapshot(conn, week_num, player_norm)
+        finally:
+            conn.close()
+    else:
+        latest_df, error_msg = get_cached_board(week_num)
+        if error_msg or latest_df is None:
+            return jsonify({'error': error_msg or f"No data available for Week {week_num}."}), 404
+        if player_norm is not None:
+            latest_df = latest_df[latest_df['player_name_norm'] == player_norm]
+        latest_df = latest_df[[col for col in LATEST_COLS if col in latest_df.columns]]
+    return app.response_class(records_json(latest_df), mimetype='application/json')
+
+
+@app.route('/api/week/<int:week_num>/props')
+def week_props_api(week_num):
+    """(NEW) The week's current board filtered by player, prop and book through the inverted index, one page at a time."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    size = min(max(request.args.get('size', PROPS_PAGE_SIZE, type=int), 1), PROPS_MAX_PAGE_SIZE)
+
+    index, error_msg = get_props_index(week_num)
+    if error_msg or index is None:
+        return jsonify({'error': error_msg or f"No data available for Week {week_num}."}), 404
+
+    row_ids = query_props_index(index, request.args.get('player', ''), request.args.get('prop', ''), request.args.get('book', ''))
+    page_rows = index['frame'].iloc[row_ids[(page - 1) * size:page * size]]
+    return jsonify({'total': len(row_ids), 'page': page, 'size': size, 'rows': json.loads(records_json(page_rows))})
+
+
+@app.route('/api/week/<int:week_num>/moves')
+def week_moves_api(week_num):
+    """(NEW) The week's biggest line moves as JSON."""
+    top_n = request.args.get('top', 25, type=int)
+
+    conn = open_odds_db(week_num)
+    if conn is not None:
+        try:
+            moves = format_line_moves(odds_db.query_line_moves(conn, week_num), top_n)
+        finally:
+            conn.close()
+    else:
+        props_df, error_msg, _ = get_cached_combined_data(week_num)
+        if error_msg or props_df is None:
+            return jsonify({'error': error_msg or f"No data available for Week {week_num}."}), 404
+        moves = find_biggest_line_moves(props_df, top_n)
+    return jsonify(moves)
+
+
+@app.route('/api/week/<int:week_num>/stream')
+def week_stream_api(week_num):
+    """
+    (NEW) Server-Sent Events: a 'snapshot' of the week's arbitrage and value opportunities, then an
+    'opportunities' event listing those that appeared, changed or disappeared after each new scrape.
+    """
+    def get_analytics(week_number):
+        analytics = get_published_analytics(week_number)
+        if analytics is None:
+            analytics, error_msg, _ = get_cached_week_analytics(week_number)
+        return analytics
+
+    stream = live_updates.event_stream(week_num, get_week_fingerprint, get_analytics)
+    response = app.response_class(stream_with_context(stream), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Don't let a reverse proxy hold events back
+    return response
+
+
+@app.route('/api/analytics/status')
+def analytics_status_api():
+    """(NEW) Per week: when its analytics bundle was built, its step timings, and whether it is stale."""
+    if not analytics_bundle.is_enabled(get_bundle_dir()):
+        return jsonify({'error': "Analytics bundles are not enabled (create nfl_data/analytics)."}), 404
+    return jsonify(analytics_bundle.staleness_report())
+
+
+@app.route('/api/scraper/status')
+def scraper_status_api():
+    """(NEW) Each book's last scrape (start, duration, outcome) and next scheduled run, as written by scrape_all.py."""
+    try:
+        with open(os.path.join(get_data_dir(), 'scraper_status.json'), encoding='utf-8') as f:
+            return jsonify(json.load(f))
+    except (OSError, ValueError):
+        return jsonify({'error': "No scraper status yet (run scrape_all.py)."}), 404
+
+
+@app.route('/api/cache/stats')
+def cache_stats_api():
+    """(NEW) Cached weeks plus, per single-flight key, how often requests waited on another's load and for how long."""
+    with _week_cache_lock:
+        cached_weeks = list(_week_cache)
+    return jsonify({'cached_weeks': cached_weeks, 'single_flight': get_load_stats()})
+
 
 if __name__ == '__main__':
+    # (NEW) Rebuild the analytics bundles in the background, in the reloader's serving process only
+    if analytics_bundle.is_enabled(get_bundle_dir()) and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        analytics_bundle.start_background_worker()
     app.run(debug=True)
\ No newline at end of file
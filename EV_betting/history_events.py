@@ -0,0 +1,173 @@
+import argparse
+import csv
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- Compacted props history ("events" files) ---
+# A *_props_history.csv repeats every prop on every scrape. The matching *_props_events.csv keeps only:
+#   seen      - the first scrape a prop appears in
+#   change    - a scrape where its line or odds differ from the previous one
+#   heartbeat - an unchanged sighting, written at most once per HEARTBEAT_INTERVAL (and, when compacting
+#               a finished history file, at the prop's last sighting) so it is known to still be listed
+# Every event row carries the prop's full line/odds, so the latest row per prop is the same as in the
+# full history, and the app can read an events file in place of the history file.
+EVENT_COLUMN = 'event'
+PROP_KEY_COLUMNS = ['game', 'player_name', 'prop_type']
+PROP_VALUE_COLUMNS = ['line', 'over_odds', 'under_odds']
+HEARTBEAT_INTERVAL = pd.Timedelta(hours=6)
+# Scrapers appending events keep each prop's last state in a sidecar next to the events file, so an append
+# costs O(props in the scrape) instead of re-reading the whole file. The sidecar records the events file's
+# size and mtime; if the file changed any other way (e.g. recompacted), it is rebuilt from the file once.
+STATE_SUFFIX = '.state.json'
+
+
+def events_path_for(history_path):
+    """fanduel_nfl_week_7_props_history.csv -> fanduel_nfl_week_7_props_events.csv"""
+    return history_path.replace('_history.csv', '_events.csv')
+
+def _read_raw(path):
+    # Everything stays text, so values are compared and written back exactly as the scrapers wrote them
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+# --- Offline compactor ---
+def compact_history(history_df, key_columns=PROP_KEY_COLUMNS, value_columns=PROP_VALUE_COLUMNS):
+    """Turns a full history frame (read as text) into its event rows, in scrape order."""
+    history_df = history_df.drop_duplicates(key_columns + ['scrape_timestamp'], keep='last') # Repeat listings in one scrape
+    timestamps = pd.to_datetime(history_df['scrape_timestamp'], format='ISO8601')
+    group_ids = history_df.groupby(key_columns, sort=False, dropna=False).ngroup().to_numpy()
+    order = np.lexsort((timestamps.to_numpy(), group_ids)) # By prop, then time
+
+    ids = group_ids[order]
+    values = history_df[value_columns].to_numpy()[order]
+    first = np.r_[True, ids[1:] != ids[:-1]]
+    last = np.r_[ids[1:] != ids[:-1], True]
+    changed = np.r_[False, (values[1:] != values[:-1]).any(axis=1)] & ~first
+    events = np.select([first, changed, last], ['seen', 'change', 'heartbeat'], '')
+
+    keep = events != ''
+    events_df = history_df.iloc[order[keep]].assign(**{EVENT_COLUMN: events[keep]})
+    return events_df.iloc[np.argsort(order[keep], kind='stable')] # Back to file (= scrape) order
+
+def compact_file(history_path, events_path=None):
+    """Writes the events file for a history CSV; the history file itself is left untouched."""
+    events_path = events_path or events_path_for(history_path)
+    events_df = compact_history(_read_raw(history_path))
+    tmp_path = events_path + '.tmp'
+    events_df.to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, events_path)
+    return events_path
+
+
+# --- Ingestion-time compaction ---
+def load_event_state(events_path, key_columns=PROP_KEY_COLUMNS, value_columns=PROP_VALUE_COLUMNS):
+    """{key: (values, last event time)} from an events file, i.e. what the next scrape is compared against."""
+    if not os.path.exists(events_path):
+        return {}
+    events_df = _read_raw(events_path).drop_duplicates(key_columns, keep='last')
+    timestamps = pd.to_datetime(events_df['scrape_timestamp'], format='ISO8601')
+    keys = zip(*(events_df[col] for col in key_columns))
+    values = zip(*(events_df[col] for col in value_columns))
+    return {key: (value, ts) for key, value, ts in zip(keys, values, timestamps)}
+
+def state_path_for(events_path):
+    return events_path + STATE_SUFFIX
+
+def _file_version(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_saved_state(events_path):
+    """The state table saved by the last append_events, or None if missing or out of date with the events file."""
+    try:
+        with open(state_path_for(events_path), encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['events_file'] != _file_version(events_path):
+            return None
+        return {tuple(key): (tuple(values), pd.Timestamp(ts)) for key, values, ts in saved['props']}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def save_state(events_path, state):
+    path = state_path_for(events_path)
+    saved = {'events_file': _file_version(events_path),
+             'props': [[list(key), list(values), ts.isoformat()] for key, (values, ts) in state.items()]}
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def _as_text(value):
+    return '' if value is None else str(value) # What csv.DictWriter writes
+
+def scrape_events(state, new_data, key_columns=PROP_KEY_COLUMNS, value_columns=PROP_VALUE_COLUMNS,
+                  heartbeat_interval=HEARTBEAT_INTERVAL):
+    """The event rows (scraper dicts plus an 'event' field) one scrape adds to `state`, which is updated in place."""
+    latest_rows = {tuple(_as_text(row.get(col)) for col in key_columns): row for row in new_data}
+    events = []
+    for key, row in latest_rows.items():
+        values = tuple(_as_text(row.get(col)) for col in value_columns)
+        scraped_at = pd.Timestamp(row['scrape_timestamp'])
+        previous = state.get(key)
+        if previous is None:
+            event = 'seen'
+        elif previous[0] != values:
+            event = 'change'
+        elif scraped_at - previous[1] >= heartbeat_interval:
+            event = 'heartbeat'
+        else:
+            continue
+        state[key] = (values, scraped_at)
+        events.append({**row, EVENT_COLUMN: event})
+    return events
+
+def append_events(new_data, events_path, default_fieldnames, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """Appends one scrape to an events file (header included if the file is new). Returns the rows written."""
+    state = load_saved_state(events_path)
+    if state is None: # First append, or the file changed outside append_events: read it in full once
+        state = load_event_state(events_path)
+    events = scrape_events(state, new_data, heartbeat_interval=heartbeat_interval)
+    file_exists = os.path.exists(events_path)
+    with open(events_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=default_fieldnames + ['scrape_timestamp', EVENT_COLUMN], extrasaction='ignore')
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(events)
+    save_state(events_path, state)
+    return len(events)
+
+
+# --- Reader ---
+def read_snapshot(events, at=None, max_age=None, key_columns=PROP_KEY_COLUMNS):
+    """
+    Rebuilds the board from an events file (path or frame): each prop's line and odds as of `at` (default:
+    the latest event), with `last_seen` set to its last event. With max_age, props whose last event is
+    older than at - max_age (no longer listed) are left out; keep max_age above the heartbeat interval.
+    """
+    events_df = _read_raw(events) if isinstance(events, str) else events
+    timestamps = pd.to_datetime(events_df['scrape_timestamp'], format='ISO8601')
+    at = timestamps.max() if at is None else pd.Timestamp(at)
+    in_range = (timestamps <= at).to_numpy()
+    snapshot = events_df[in_range].drop_duplicates(key_columns, keep='last')
+    last_seen = timestamps[in_range].loc[snapshot.index]
+    if max_age is not None:
+        fresh = (last_seen >= at - pd.Timedelta(max_age)).to_numpy()
+        snapshot, last_seen = snapshot[fresh], last_seen[fresh]
+    return snapshot.drop(columns=[EVENT_COLUMN]).assign(last_seen=last_seen).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Compact the props history CSVs into change-event files.")
+    parser.add_argument('--data-dir', default=os.path.normpath(os.path.join(script_dir, '..', 'nfl_data')))
+    args = parser.parse_args()
+
+    for history_path in sorted(glob.glob(os.path.join(args.data_dir, 'week_*', '*_props_history.csv'))):
+        events_path = compact_file(history_path)
+        print(f"  {history_path} ({os.path.getsize(history_path) // 1024} KB) -> "
+              f"{events_path} ({os.path.getsize(events_path) // 1024} KB)")
+    print("✅ Compaction complete. The app now reads the *_props_events.csv files.")
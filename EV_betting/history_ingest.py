@@ -0,0 +1,49 @@
+import io
+import os
+import pandas as pd
+
+# The first bytes of a file are remembered so a rewritten (not appended) file is detected and re-read in full.
+HEAD_BYTES = 4096
+
+
+def read_csv_incremental(path, state=None):
+    """
+    Reads an append-only CSV (the scrapers' *_props_history.csv files), parsing only the bytes
+    appended since `state` was taken.
+
+    Returns (new_state, new_rows, reset). new_rows holds just the freshly parsed rows, or every
+    row when reset is True (first read, truncated/replaced file, or a changed header). Only
+    complete lines are consumed, so a scrape that is still being written is picked up next time.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        reset = (
+            state is None
+            or state['columns'] is None
+            or stat.st_ino != state['inode']
+            or stat.st_size < state['offset']
+            or head[:len(state['head'])] != state['head']
+        )
+        offset = 0 if reset else state['offset']
+        f.seek(offset)
+        data = f.read()
+
+    data = data[:data.rfind(b'\n') + 1] # Drop a trailing partial line
+    columns = None if reset else state['columns']
+
+    if not data:
+        new_rows = pd.DataFrame(columns=columns)
+    elif reset:
+        new_rows = pd.read_csv(io.BytesIO(data))
+        columns = list(new_rows.columns)
+    else:
+        new_rows = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+
+    new_state = {
+        'inode': stat.st_ino,
+        'offset': offset + len(data),
+        'head': head if reset else state['head'],
+        'columns': columns,
+    }
+    return new_state, new_rows, reset
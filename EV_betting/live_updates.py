@@ -0,0 +1,139 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from analytics_bundle import json_default
+
+# --- Live opportunity stream (Server-Sent Events) ---
+# One watcher thread per week, shared by everyone streaming that week. It polls the week's source
+# fingerprint (a few stat calls) every WATCH_INTERVAL seconds; when a scrape lands it takes the week's
+# new analytics and pushes only the arbitrage and value opportunities that appeared, changed or
+# disappeared. The thread exits once its last subscriber disconnects.
+WATCH_INTERVAL = 1.0 # Seconds between fingerprint checks: the push latency after a scrape lands
+KEEPALIVE_INTERVAL = 15 # Seconds; an SSE comment keeps proxies from closing idle streams
+
+# How an opportunity is identified across scrapes; anything else about it (odds, books, margin) can change
+OPPORTUNITY_KEYS = {
+    'arbitrage': lambda op: (op['player_name'], op['prop_type'], op['line']),
+    'odds_shopping': lambda op: (op['type'], op['player_name'], op['prop_type'], op['line']),
+    'line_shopping': lambda op: (op['player_name'], op['prop_type']),
+}
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def _plain(value):
+    """JSON-safe copy (numpy scalars -> Python), also used to compare two versions of an opportunity."""
+    return json.loads(json.dumps(value, default=json_default))
+
+def opportunities_from(analytics):
+    """{kind: {key: opportunity}} for the arbitrage and value bet lists of a week's analytics."""
+    lists = {'arbitrage': analytics['arbitrage_ops'], **analytics['value_bets']}
+    return {kind: {json.dumps(key_func(op), default=json_default): _plain(op) for op in lists.get(kind, [])}
+            for kind, key_func in OPPORTUNITY_KEYS.items()}
+
+def diff_opportunities(old, new):
+    """The changes from one set of opportunities to the next, as {kind, change, opportunity} dicts."""
+    changes = []
+    for kind in OPPORTUNITY_KEYS:
+        old_ops, new_ops = old.get(kind, {}), new.get(kind, {})
+        for key, op in new_ops.items():
+            if key not in old_ops:
+                changes.append({'kind': kind, 'change': 'appeared', 'opportunity': op})
+            elif old_ops[key] != op:
+                changes.append({'kind': kind, 'change': 'changed', 'opportunity': op})
+        for key, op in old_ops.items():
+            if key not in new_ops:
+                changes.append({'kind': kind, 'change': 'disappeared', 'opportunity': op})
+    return changes
+
+def format_sse(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, default=json_default)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _watch(week_number, watcher, get_fingerprint, get_analytics):
+    while True:
+        with _watchers_lock:
+            if not watcher['subscribers']:
+                del _watchers[week_number] # Last listener left; the next one starts a fresh watcher
+                return
+        time.sleep(WATCH_INTERVAL)
+
+        fingerprint = get_fingerprint(week_number)
+        if fingerprint == watcher['fingerprint']:
+            continue
+        analytics = get_analytics(week_number)
+        if analytics is None:
+            continue # Mid-write or unreadable; retried on the next check
+        opportunities = opportunities_from(analytics)
+        changes = diff_opportunities(watcher['opportunities'], opportunities)
+        watcher['fingerprint'], watcher['opportunities'] = fingerprint, opportunities
+        if not changes:
+            continue
+
+        watcher['sequence'] += 1
+        message = {'week': week_number, 'detected_at': datetime.now().isoformat(timespec='seconds'), 'changes': changes}
+        with _watchers_lock:
+            subscribers = list(watcher['subscribers'])
+        for subscriber in subscribers:
+            subscriber.put((watcher['sequence'], message))
+
+def subscribe(week_number, get_fingerprint, get_analytics):
+    """
+    Registers a listener for the week, starting its watcher if needed. Returns (queue, snapshot) where
+    snapshot is the current opportunities per kind, or (None, None) if the week has no data.
+    """
+    new_watcher = None
+    while True:
+        with _watchers_lock:
+            watcher = _watchers.get(week_number)
+            if watcher is None and new_watcher is not None:
+                watcher = new_watcher
+                _watchers[week_number] = watcher
+                threading.Thread(target=_watch, args=(week_number, watcher, get_fingerprint, get_analytics),
+                                 name=f'week-{week_number}-watcher', daemon=True).start()
+            if watcher is not None: # Its thread checks for subscribers under this lock, so it stays alive for us
+                subscriber = queue.Queue()
+                watcher['subscribers'].add(subscriber)
+                snapshot = {kind: list(ops.values()) for kind, ops in watcher['opportunities'].items()}
+                return subscriber, snapshot
+
+        # No watcher yet: loaded outside the lock, since a cold week can take seconds and other weeks' streams
+        # must not wait on it. If another listener starts one meanwhile, the next pass joins that one instead.
+        fingerprint = get_fingerprint(week_number)
+        analytics = get_analytics(week_number)
+        if analytics is None:
+            return None, None
+        new_watcher = {'subscribers': set(), 'fingerprint': fingerprint, 'opportunities': opportunities_from(analytics),
+                       'sequence': 0}
+
+def unsubscribe(week_number, subscriber):
+    with _watchers_lock:
+        watcher = _watchers.get(week_number)
+        if watcher is not None:
+            watcher['subscribers'].discard(subscriber)
+
+def event_stream(week_number, get_fingerprint, get_analytics):
+    """SSE body: a 'snapshot' event with the current opportunities, then one 'opportunities' event per changing scrape."""
+    subscriber, snapshot = subscribe(week_number, get_fingerprint, get_analytics)
+    if subscriber is None:
+        yield format_sse('error', {'error': f"No data available for Week {week_number}."})
+        return
+    try:
+        yield format_sse('snapshot', {'week': week_number, **snapshot})
+        while True:
+            try:
+                sequence, message = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse('opportunities', message, event_id=sequence)
+    finally: # Client disconnected (the server closes the generator)
+        unsubscribe(week_number, subscriber)
@@ -0,0 +1,336 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from prop_parsing import (
+    TEAM_MAP, normalize_player_name, normalize_game_name, parse_player_prop, build_player_prefix_index,
+    extract_player_name
+)
+
+# --- SQLite odds history ---
+# One row per prop per scrape, across every week, keyed the way the app keys props after cleaning.
+# Optional and opt-in: scrapers only insert once the database file exists (see the backfill below).
+DB_FILE_NAME = 'odds_history.sqlite3'
+BOOK_LABELS = {'fanduel': 'Fanduel', 'draftkings': 'Draftkings'} # Same labels the app gives each book
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS props (
+    id INTEGER PRIMARY KEY,
+    week INTEGER NOT NULL,
+    sportsbook TEXT NOT NULL,
+    game TEXT NOT NULL,
+    game_norm TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    player_name_norm TEXT NOT NULL,
+    team_name TEXT NOT NULL,
+    prop_type TEXT NOT NULL,
+    prop_main TEXT NOT NULL,
+    prop_qualifier TEXT NOT NULL,
+    line REAL,
+    over_odds INTEGER NOT NULL,
+    under_odds INTEGER NOT NULL,
+    scrape_timestamp TEXT NOT NULL
+);
+-- Covering index for a prop's history (and the first/last points of a line move): no table lookups
+CREATE INDEX IF NOT EXISTS props_history_idx ON props (
+    player_name_norm, prop_main, prop_qualifier, sportsbook, scrape_timestamp, line, over_odds, under_odds, week
+);
+-- A week's props grouped by player/prop/book (the line-move groups)
+CREATE INDEX IF NOT EXISTS props_week_idx ON props (
+    week, player_name_norm, prop_main, prop_qualifier, sportsbook, line, game_norm, scrape_timestamp
+);
+-- The current board: the latest row per (week, player, prop, qualifier, book, line, game), upserted as each scrape lands
+CREATE TABLE IF NOT EXISTS board (
+    week INTEGER NOT NULL,
+    player_name_norm TEXT NOT NULL,
+    prop_main TEXT NOT NULL,
+    prop_qualifier TEXT NOT NULL,
+    sportsbook TEXT NOT NULL,
+    line REAL NOT NULL,
+    game_norm TEXT NOT NULL,
+    game TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    team_name TEXT NOT NULL,
+    prop_type TEXT NOT NULL,
+    over_odds INTEGER NOT NULL,
+    under_odds INTEGER NOT NULL,
+    scrape_timestamp TEXT NOT NULL,
+    PRIMARY KEY (week, player_name_norm, prop_main, prop_qualifier, sportsbook, line, game_norm)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scrapes (
+    week INTEGER NOT NULL,
+    sportsbook TEXT NOT NULL,
+    scrape_timestamp TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (week, sportsbook, scrape_timestamp)
+);
+"""
+
+PROP_COLUMNS = ['week', 'sportsbook', 'game', 'game_norm', 'player_name', 'player_name_norm', 'team_name', 'prop_type',
+                'prop_main', 'prop_qualifier', 'line', 'over_odds', 'under_odds', 'scrape_timestamp']
+BOARD_KEYS = ['week', 'player_name_norm', 'prop_main', 'prop_qualifier', 'sportsbook', 'line', 'game_norm']
+BOARD_VALUES = ['game', 'player_name', 'team_name', 'prop_type', 'over_odds', 'under_odds', 'scrape_timestamp']
+
+# A later (or same-scrape, later-listed) row replaces the board row; an older one never does
+UPSERT_BOARD_SQL = (
+    f"INSERT INTO board ({', '.join(BOARD_KEYS + BOARD_VALUES)}) VALUES ({', '.join('?' * len(BOARD_KEYS + BOARD_VALUES))})"
+    f" ON CONFLICT ({', '.join(BOARD_KEYS)}) DO UPDATE SET {', '.join(f'{col} = excluded.{col}' for col in BOARD_VALUES)}"
+    " WHERE excluded.scrape_timestamp >= board.scrape_timestamp"
+)
+
+# The board rebuilt from the history: each key's latest row (SQLite takes bare columns from the MAX row)
+BUILD_BOARD_SQL = (
+    f"INSERT OR REPLACE INTO board ({', '.join(BOARD_KEYS + BOARD_VALUES)})"
+    f" SELECT {', '.join(BOARD_KEYS + BOARD_VALUES[:-1])}, MAX(scrape_timestamp) FROM props"
+    " WHERE line IS NOT NULL{where}"
+    f" GROUP BY {', '.join(BOARD_KEYS)}"
+)
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+
+def is_enabled(db_path):
+    return os.path.exists(db_path)
+
+def connect(db_path):
+    """
+    Opens a connection in WAL mode, so the scraper threads and the Flask app can read while one of them
+    writes. Connections are cheap; open one per thread/request rather than sharing it.
+    """
+    conn = sqlite3.connect(db_path, timeout=30) # Writers wait on each other's transactions instead of failing
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA synchronous=NORMAL') # Safe with WAL; a crash can only lose the last commit
+    with _init_lock:
+        if db_path not in _initialized_paths:
+            conn.execute('PRAGMA journal_mode=WAL') # Persistent, stored in the database file
+            conn.executescript(SCHEMA)
+            with conn: # Databases created before the board existed get it built from their history once
+                if conn.execute("SELECT 1 FROM board LIMIT 1").fetchone() is None:
+                    conn.execute(BUILD_BOARD_SQL.format(where=''))
+            _initialized_paths.add(db_path)
+    return conn
+
+def _parse_odds(odds):
+    try:
+        return int(str(odds).replace('−', '-'))
+    except ValueError:
+        return None
+
+def _parse_line(line):
+    try:
+        return float(line)
+    except (TypeError, ValueError):
+        return None
+
+def _fanduel_names(conn, week):
+    """What DraftKings names are resolved against: the week's stored FanDuel names and their teams."""
+    known = conn.execute(
+        "SELECT player_name, player_name_norm, team_name FROM props WHERE week = ? AND sportsbook = 'Fanduel'"
+        " GROUP BY player_name", (week,)
+    ).fetchall()
+    return {
+        'teams': {r['player_name_norm']: r['team_name'] for r in known if r['team_name']},
+        'canonical': {r['player_name_norm']: r['player_name'] for r in known},
+        'prefix_index': build_player_prefix_index({r['player_name'] for r in known}) if known else None,
+    }
+
+def _resolve_name(player_name, prop_type, team_name, names):
+    """(player_name, player_norm, prop_main, prop_qualifier, team_name) for a raw row, as the app's cleaning derives them."""
+    if names['prefix_index'] is not None:
+        player_name = extract_player_name(player_name, None, names['prefix_index'])
+    player_norm = normalize_player_name(player_name)
+    player_name = names['canonical'].get(player_norm, player_name) # FanDuel's spelling, as in the app
+    prop_main, prop_qualifier = parse_player_prop(prop_type, player_name)
+    return player_name, player_norm, prop_main, prop_qualifier, names['teams'].get(player_norm) or team_name or ''
+
+def _fanduel_norms(conn, week):
+    return {r[0] for r in conn.execute(
+        "SELECT DISTINCT player_name_norm FROM props WHERE week = ? AND sportsbook = 'Fanduel'", (week,)
+    )}
+
+def _resolve_draftkings_rows(conn, week, previous_norms):
+    """
+    Re-resolves the week's DraftKings rows that were stored before FanDuel listed their player (both books
+    scrape in parallel, so a DraftKings scrape can land first): called in the transaction that adds FanDuel
+    rows, with the FanDuel names stored before it. Those rows and their board entries move to the name they
+    now resolve to.
+    """
+    if not _fanduel_norms(conn, week) - previous_norms:
+        return 0 # No new FanDuel names, nothing can resolve differently
+    names = _fanduel_names(conn, week)
+    unresolved = [r[0] for r in conn.execute(
+        "SELECT DISTINCT player_name_norm FROM props WHERE week = ? AND sportsbook = 'Draftkings'", (week,)
+    ) if r[0] not in previous_norms]
+    moved_norms, updated = set(), 0
+    for player_norm in unresolved:
+        for player_name, prop_type, team_name in conn.execute(
+            "SELECT DISTINCT player_name, prop_type, team_name FROM props"
+            " WHERE week = ? AND sportsbook = 'Draftkings' AND player_name_norm = ?", (week, player_norm)
+        ).fetchall():
+            resolved = _resolve_name(player_name, prop_type, team_name, names)
+            if resolved[1] not in names['canonical'] or (resolved[0], resolved[1], resolved[4]) == (player_name, player_norm, team_name):
+                continue # Still no FanDuel match, or already stored under it
+            updated += conn.execute(
+                "UPDATE props SET player_name = ?, player_name_norm = ?, prop_main = ?, prop_qualifier = ?, team_name = ?"
+                " WHERE week = ? AND sportsbook = 'Draftkings' AND player_name = ? AND prop_type = ? AND team_name = ?",
+                (*resolved, week, player_name, prop_type, team_name)
+            ).rowcount
+            moved_norms.update([player_norm, resolved[1]])
+    if moved_norms: # Rebuild those players' DraftKings board rows from their (re-keyed) history
+        condition = f"week = ? AND sportsbook = 'Draftkings' AND player_name_norm IN ({', '.join('?' * len(moved_norms))})"
+        conn.execute(f"DELETE FROM board WHERE {condition}", (week, *moved_norms))
+        conn.execute(BUILD_BOARD_SQL.format(where=f" AND {condition}"), (week, *moved_norms))
+    return updated
+
+def insert_scrape(db_path, rows, week, book):
+    """
+    Bulk-inserts one scrape's prop rows (the dicts the scrapers write to the history CSVs) in a single
+    transaction. DraftKings names are resolved against the FanDuel names already stored for the week,
+    like the app's cleaning does; DraftKings rows that landed before their FanDuel names are re-resolved
+    once those arrive. Returns the number of rows inserted (0 if this scrape is already stored).
+    """
+    sportsbook = BOOK_LABELS[book]
+    conn = connect(db_path)
+    try:
+        with conn: # One transaction: the scrape lands completely or not at all
+            names = {'teams': {}, 'canonical': {}, 'prefix_index': None}
+            if sportsbook != 'Fanduel':
+                names = _fanduel_names(conn, week)
+            else:
+                previous_norms = _fanduel_norms(conn, week)
+
+            records = []
+            for row in rows:
+                player_name, game, prop_type = row.get('player_name'), row.get('game'), row.get('prop_type')
+                over_odds, under_odds = _parse_odds(row.get('over_odds')), _parse_odds(row.get('under_odds'))
+                if not player_name or not game or over_odds is None or under_odds is None:
+                    continue # The app drops these rows too
+                player_name, player_norm, prop_main, prop_qualifier, team_name = _resolve_name(
+                    player_name, prop_type, row.get('team_name'), names
+                )
+                records.append((
+                    week, sportsbook, game, normalize_game_name(str(game), TEAM_MAP), player_name, player_norm,
+                    team_name, str(prop_type), prop_main, prop_qualifier, _parse_line(row.get('line')),
+                    over_odds, under_odds, row['scrape_timestamp']
+                ))
+
+            # A scrape already in the database (e.g. a re-run backfill) is skipped as a whole
+            row_counts = Counter(record[-1] for record in records)
+            new_times = {ts for ts, count in sorted(row_counts.items()) if conn.execute(
+                "INSERT OR IGNORE INTO scrapes (week, sportsbook, scrape_timestamp, row_count) VALUES (?, ?, ?, ?)",
+                (week, sportsbook, ts, count)
+            ).rowcount}
+            records = [record for record in records if record[-1] in new_times]
+            conn.executemany(
+                f"INSERT INTO props ({', '.join(PROP_COLUMNS)}) VALUES ({', '.join('?' * len(PROP_COLUMNS))})", records
+            )
+            # Same transaction: the board never shows half a scrape
+            positions = [PROP_COLUMNS.index(col) for col in BOARD_KEYS + BOARD_VALUES]
+            conn.executemany(UPSERT_BOARD_SQL, [
+                [record[i] for i in positions] for record in records if record[PROP_COLUMNS.index('line')] is not None
+            ])
+            if sportsbook == 'Fanduel' and records:
+                _resolve_draftkings_rows(conn, week, previous_norms)
+        return len(records)
+    finally:
+        conn.close()
+
+
+# --- Queries ---
+def has_week(conn, week):
+    return conn.execute("SELECT 1 FROM scrapes WHERE week = ? LIMIT 1", (week,)).fetchone() is not None
+
+def query_history(conn, player_norm, prop_main, prop_qualifier, week=None):
+    """One prop's history across all books (and every week unless `week` is given), oldest first."""
+    sql = (
+        "SELECT scrape_timestamp, line, over_odds, under_odds, sportsbook, week FROM props"
+        " WHERE player_name_norm = ? AND prop_main = ? AND prop_qualifier = ?"
+    )
+    params = [player_norm, prop_main, prop_qualifier]
+    if week is not None:
+        sql += " AND week = ?"
+        params.append(week)
+    return pd.read_sql_query(sql + " ORDER BY scrape_timestamp, id", conn, params=params)
+
+def query_latest_snapshot(conn, week, player_norm=None):
+    """
+    The latest row of each (player, prop, qualifier, book, line, game) in a week, optionally for one
+    player: a primary-key range read of the board table, which ingestion keeps current. Players without
+    a known team (DraftKings-only names) get a NULL team, as the app's cleaned frames have.
+    """
+    sql = (
+        "SELECT player_name, player_name_norm, NULLIF(team_name, '') AS team_name, game, game_norm, prop_type, prop_main, prop_qualifier,"
+        " sportsbook, line, over_odds, under_odds, scrape_timestamp FROM board WHERE week = ?"
+    )
+    params = [week]
+    if player_norm is not None:
+        sql += " AND player_name_norm = ?"
+        params.append(player_norm)
+    sql += " ORDER BY player_name_norm, prop_main, prop_qualifier, line, sportsbook, game_norm" # The app's board order
+    return pd.read_sql_query(sql, conn, params=params)
+
+def query_line_moves(conn, week):
+    """
+    First and last point of every (player, prop, qualifier, book) in a week that has at least two points.
+    Each end is a single seek on props_history_idx, in index order (no sort).
+    """
+    sql = """
+        WITH groups AS (
+            SELECT player_name_norm, prop_main, prop_qualifier, sportsbook, COUNT(*) AS data_points
+            FROM props WHERE week = :week
+            GROUP BY player_name_norm, prop_main, prop_qualifier, sportsbook
+            HAVING COUNT(*) >= 2
+        ), ends AS (
+            SELECT g.*,
+                (SELECT id FROM props p WHERE p.player_name_norm = g.player_name_norm AND p.prop_main = g.prop_main
+                    AND p.prop_qualifier = g.prop_qualifier AND p.sportsbook = g.sportsbook AND p.week = :week
+                    ORDER BY p.scrape_timestamp LIMIT 1) AS start_id,
+                (SELECT id FROM props p WHERE p.player_name_norm = g.player_name_norm AND p.prop_main = g.prop_main
+                    AND p.prop_qualifier = g.prop_qualifier AND p.sportsbook = g.sportsbook AND p.week = :week
+                    ORDER BY p.scrape_timestamp DESC LIMIT 1) AS end_id
+            FROM groups g
+        )
+        SELECT e.player_name_norm, e.prop_main, e.prop_qualifier, e.sportsbook, e.data_points, s.player_name,
+            s.line AS start_line, f.line AS end_line, s.scrape_timestamp AS start_time, f.scrape_timestamp AS end_time
+        FROM ends e JOIN props s ON s.id = e.start_id JOIN props f ON f.id = e.end_id
+    """
+    return pd.read_sql_query(sql, conn, params={'week': week})
+
+
+# --- Backfill from the history CSVs ---
+def backfill_from_csv(data_dir, db_path):
+    """
+    Loads every week's *_props_history.csv into the database, one transaction per scrape, FanDuel first
+    so DraftKings names resolve. Scrapes already in the database are skipped, so it can be re-run.
+    Legacy snapshot files have no scrape timestamps and are left out.
+    """
+    weeks = sorted(int(m.group(1)) for m in (re.match(r'^week_(\d+)$', item) for item in os.listdir(data_dir)) if m)
+    for week in weeks:
+        for book in ['fanduel', 'draftkings']:
+            path = os.path.join(data_dir, f'week_{week}', f'{book}_nfl_week_{week}_props_history.csv')
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+            inserted = sum(
+                insert_scrape(db_path, scrape.to_dict('records'), week, book)
+                for _, scrape in df.groupby('scrape_timestamp', sort=True)
+            )
+            print(f"  Week {week} {book}: {inserted} new rows from {path}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Create/backfill the SQLite odds history from the nfl_data CSVs.")
+    parser.add_argument('--data-dir', default=os.path.normpath(os.path.join(script_dir, '..', 'nfl_data')))
+    args = parser.parse_args()
+
+    db_path = os.path.join(args.data_dir, DB_FILE_NAME)
+    print(f"Backfilling {db_path} ...")
+    backfill_from_csv(args.data_dir, db_path)
+    print("✅ Odds history database ready:", db_path)
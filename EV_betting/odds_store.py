@@ -0,0 +1,225 @@
+import argparse
+import glob
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError: # Optional: without pyarrow the app and scrapers keep using the CSV files only
+    pa = None
+
+# --- Partitioned Parquet odds store ---
+# Layout: nfl_data/odds_store/season=2025/week=7/book=fanduel/kind=props/<part>.parquet
+# Every scrape adds one part file, so a partition is append-only just like the *_history.csv files.
+STORE_DIR_NAME = 'odds_store'
+BOOKS = ['fanduel', 'draftkings']
+KINDS = ['props', 'game_lines']
+
+# Column types are decided by name, which covers both books' props and game-line layouts
+ODDS_COLUMNS = {'over_odds', 'under_odds', 'spread_odds', 'total_odds', 'away_spread_odds', 'home_spread_odds',
+                'away_moneyline', 'home_moneyline'}
+LINE_COLUMNS = {'line', 'spread', 'total_line', 'away_spread_line', 'home_spread_line'}
+TIMESTAMP_COLUMNS = {'scrape_timestamp'}
+ODDS_LIMIT = 32767 # Odds are stored as int16; longer shots are clipped (an implied probability under 0.31% either way)
+PARTITION_COLUMNS = {'season', 'week', 'book', 'kind'} # Encoded in the directory names, never stored in the files
+
+_PARTITION_DIR_PATTERN = re.compile(r'^(season|week|book|kind)=(.+)$')
+
+
+def is_available():
+    return pa is not None
+
+def is_enabled(store_root):
+    """The store is opt-in: scrapers only write to it once the converter (or a user) has created its root."""
+    return is_available() and os.path.isdir(store_root)
+
+def nfl_season(timestamp):
+    """A season is named after the year it kicks off; January/February games belong to the previous one."""
+    return timestamp.year if timestamp.month >= 3 else timestamp.year - 1
+
+def partition_dir(store_root, season, week, book, kind):
+    return os.path.join(store_root, f'season={season}', f'week={week}', f'book={book}', f'kind={kind}')
+
+def find_partition(store_root, week, book, kind, season=None):
+    """Returns the partition directory holding a week's data (from the latest season that has it), or None."""
+    seasons = [season] if season is not None else sorted(
+        (int(m.group(2)) for m in map(_PARTITION_DIR_PATTERN.match, _listdir(store_root)) if m and m.group(1) == 'season'),
+        reverse=True
+    )
+    for s in seasons:
+        path = partition_dir(store_root, s, week, book, kind)
+        if partition_files(path):
+            return path
+    return None
+
+def partition_files(path):
+    return sorted(glob.glob(os.path.join(path, '*.parquet'))) if path and os.path.isdir(path) else []
+
+def _listdir(path):
+    return os.listdir(path) if os.path.isdir(path) else []
+
+
+# --- Writing ---
+def _column_type(name):
+    if name in ODDS_COLUMNS:
+        return pa.int16()
+    if name in LINE_COLUMNS:
+        return pa.float32()
+    if name in TIMESTAMP_COLUMNS:
+        return pa.timestamp('us')
+    return pa.dictionary(pa.int32(), pa.string()) # Names, games, logos etc. repeat on every row of a scrape
+
+def to_table(df):
+    """Converts raw scraper rows (as written to the CSVs) into a typed Arrow table."""
+    df = df.drop(columns=[col for col in df.columns if col in PARTITION_COLUMNS])
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in ODDS_COLUMNS:
+            # DraftKings uses the Unicode minus sign; cleaned once here instead of on every read
+            values = pd.to_numeric(values.astype(str).str.replace('−', '-'), errors='coerce')
+            values = values.clip(-ODDS_LIMIT, ODDS_LIMIT).round().astype('Int16')
+        elif col in LINE_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce')
+        elif col in TIMESTAMP_COLUMNS:
+            values = pd.to_datetime(values, format='ISO8601')
+        else:
+            values = values.astype(object).where(values.notna(), None)
+            values = values.map(lambda v: v if v is None else str(v))
+        columns[col] = pa.array(values, type=_column_type(col), from_pandas=True)
+    return pa.table(columns)
+
+def write_snapshot(rows, store_root, week, book, kind, season=None, part_name=None, columns=None):
+    """
+    Writes one scrape (a list of row dicts or a DataFrame, limited to `columns` if given) as a new part
+    file in its partition. The file is written under a temporary name and renamed into place, so readers
+    never see half a part. Returns the path written, or None when there was nothing to write.
+    """
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    if df.empty:
+        return None
+
+    timestamps = pd.to_datetime(df['scrape_timestamp'], format='ISO8601') if 'scrape_timestamp' in df.columns else None
+    if season is None:
+        season = nfl_season(timestamps.min() if timestamps is not None else datetime.now())
+    if part_name is None:
+        scraped_at = timestamps.min() if timestamps is not None else datetime.now()
+        part_name = f'part-{scraped_at:%Y%m%dT%H%M%S%f}'
+
+    path = partition_dir(store_root, season, week, book, kind)
+    os.makedirs(path, exist_ok=True)
+    final_path = os.path.join(path, f'{part_name}.parquet')
+    tmp_path = final_path + '.tmp'
+    pq.write_table(to_table(df), tmp_path, compression='zstd')
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+# --- Reading ---
+def _to_pandas(table):
+    """Decodes dictionary columns to plain strings and widens lines to float64, matching what read_csv returns."""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.string()))
+        elif pa.types.is_float32(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.float64()))
+    return table.to_pandas()
+
+def read_files(files, columns=None):
+    """
+    Reads part files into one DataFrame. Only `columns` (those present) are decoded; part files written
+    before a column existed simply read it as nulls.
+    """
+    if not files:
+        return pd.DataFrame(columns=columns)
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files])
+    if columns is not None:
+        columns = [col for col in columns if col in schema.names]
+    dataset = ds.dataset(files, schema=schema, format='parquet')
+    return _to_pandas(dataset.to_table(columns=columns))
+
+def read_week(store_root, week, book, kind, columns=None, season=None):
+    """
+    Reads a week's props or game lines for one book from the store (empty DataFrame if it has none).
+    Week, book and kind select a partition directory, so nothing outside it is opened.
+    """
+    return read_files(partition_files(find_partition(store_root, week, book, kind, season)), columns)
+
+def read_partition_incremental(path, state=None, columns=None):
+    """
+    Same contract as history_ingest.read_csv_incremental, for a store partition directory: only part
+    files added since `state` are read. A removed or rewritten part (e.g. a re-run converter) resets.
+    """
+    files = {f: (os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in partition_files(path)}
+    reset = state is None or any(files.get(f) != stat for f, stat in state['files'].items())
+    new_files = sorted(files) if reset else sorted(f for f in files if f not in state['files'])
+    return {'files': files}, read_files(new_files, columns), reset
+
+
+# --- One-shot CSV converter ---
+def _source_csv(week_path, book, week, kind):
+    """The CSV the app would load: the history file if there is one, otherwise the legacy snapshot."""
+    for suffix in [f'{kind}_history', kind]:
+        path = os.path.join(week_path, f'{book}_nfl_week_{week}_{suffix}.csv')
+        if os.path.exists(path):
+            return path
+    return None
+
+def convert_csv_data(data_dir, season=None):
+    """
+    Converts every nfl_data/week_N CSV into the store. Each source replaces its partition with a single
+    'converted' part (the history CSV already holds every scrape), so re-running never duplicates rows. Files without
+    timestamps (the legacy snapshots) get `season`, or else the season most of the timestamped data is in.
+    """
+    store_root = os.path.join(data_dir, STORE_DIR_NAME)
+    sources = []
+    for item in sorted(_listdir(data_dir)):
+        match = re.match(r'^week_(\d+)$', item)
+        if not match:
+            continue
+        week = int(match.group(1))
+        for book in BOOKS:
+            for kind in KINDS:
+                path = _source_csv(os.path.join(data_dir, item), book, week, kind)
+                if path:
+                    sources.append((week, book, kind, path, pd.read_csv(path)))
+
+    seasons = Counter(
+        nfl_season(pd.to_datetime(df['scrape_timestamp'], format='ISO8601').min())
+        for *_, df in sources if 'scrape_timestamp' in df.columns and not df.empty
+    )
+    fallback_season = season or (seasons.most_common(1)[0][0] if seasons else nfl_season(datetime.now()))
+
+    for week, book, kind, path, df in sources:
+        for old_part in partition_files(find_partition(store_root, week, book, kind)):
+            os.remove(old_part)
+        written = write_snapshot(
+            df, store_root, week, book, kind,
+            season=season or (None if 'scrape_timestamp' in df.columns else fallback_season),
+            part_name='converted'
+        )
+        if written:
+            print(f"  {path} ({os.path.getsize(path) // 1024} KB) -> {written} ({os.path.getsize(written) // 1024} KB)")
+    return store_root
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Convert the nfl_data CSVs into the partitioned Parquet odds store.")
+    parser.add_argument('--data-dir', default=os.path.normpath(os.path.join(script_dir, '..', 'nfl_data')))
+    parser.add_argument('--season', type=int, default=None, help="Season for every file (default: from the scrape timestamps)")
+    args = parser.parse_args()
+
+    if not is_available():
+        raise SystemExit("pyarrow is required for the odds store (pip install pyarrow).")
+    print(f"Converting CSVs in {os.path.abspath(args.data_dir)} ...")
+    print("✅ Odds store written to:", convert_csv_data(args.data_dir, args.season))
@@ -0,0 +1,136 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Name and prop-string normalization shared by the app's cleaning and the odds history database,
+# so rows inserted by the scrapers get the same keys the app derives from the CSVs.
+
+# --- Constants & Mappings ---
+TEAM_MAP = {
+    'ARI Cardinals': 'Arizona Cardinals', 'ATL Falcons': 'Atlanta Falcons', 'BAL Ravens': 'Baltimore Ravens', 'BUF Bills': 'Buffalo Bills', 'CAR Panthers': 'Carolina Panthers', 'CHI Bears': 'Chicago Bears', 'CIN Bengals': 'Cincinnati Bengals', 'CLE Browns': 'Cleveland Browns', 'DAL Cowboys': 'Dallas Cowboys', 'DEN Broncos': 'Denver Broncos', 'DET Lions': 'Detroit Lions', 'GB Packers': 'Green Bay Packers', 'HOU Texans': 'Houston Texans', 'IND Colts': 'Indianapolis Colts', 'JAX Jaguars': 'Jacksonville Jaguars', 'KC Chiefs': 'Kansas City Chiefs', 'LV Raiders': 'Las Vegas Raiders', 'LA Chargers': 'Los Angeles Chargers', 'LA Rams': 'Los Angeles Rams', 'MIA Dolphins': 'Miami Dolphins', 'MIN Vikings': 'Minnesota Vikings', 'NE Patriots': 'New England Patriots', 'NO Saints': 'New Orleans Saints', 'NY Giants': 'New York Giants', 'NY Jets': 'New York Jets', 'PHI Eagles': 'Philadelphia Eagles', 'PIT Steelers': 'Pittsburgh Steelers', 'SF 49ers': 'San Francisco 49ers', 'SEA Seahawks': 'Seattle Seahawks', 'TB Buccaneers': 'Tampa Bay Buccaneers', 'TEN Titans': 'Tennessee Titans', 'WAS Commanders': 'Washington Commanders'
+}
+
+
+def normalize_player_name(name):
+    return unicodedata.normalize('NFD', name).encode('ascii', 'ignore').decode("utf-8").lower().replace(" jr.", "").replace(" sr.", "").replace(".", "").replace("'", "")
+
+def normalize_game_name(game_str, team_map):
+    """Expands short team names and orders the two teams, so both books' spellings of a game match."""
+    for short, long in team_map.items():
+        game_str = game_str.replace(short, long)
+    teams = game_str.split(' @ ')
+    return ' @ '.join(sorted(teams))
+
+# --- THIS IS THE CORRECTED DICTIONARY ---
+PROP_TYPE_MAP = {
+    # Passing Touchdowns
+    'Passing Touchdowns': 'Passing Touchdowns', 'Passing TDs': 'Passing Touchdowns', 'Pass TDs': 'Passing Touchdowns', 'TDs': 'Passing Touchdowns',
+
+    # Passing Yards (FIXED)
+    'Passing Yards': 'Passing Yards', 'Passing Yds': 'Passing Yards', 'Pass Yds': 'Passing Yards', 'Pass Yards': 'Passing Yards', 'Yds': 'Passing Yards',
+
+    # Passing Completions (FIXED)
+    'Passing Completions': 'Passing Completions', 'Completions': 'Passing Completions', 'Pass Completions': 'Passing Completions', 'Passing Completion': 'Passing Completions', 'Passing': 'Passing Completions',
+
+    # Passing Attempts
+    'Passing Attempts': 'Passing Attempts', 'Pass Attempts': 'Passing Attempts',
+
+    # Interceptions
+    'Interceptions Thrown': 'Interceptions Thrown', 'Interceptions': 'Interceptions Thrown', 'Interception': 'Interceptions Thrown',
+
+    # Receiving Yards (FIXED)
+    'Receiving Yards': 'Receiving Yards', 'Receiving Yds': 'Receiving Yards', 'Rec Yards': 'Receiving Yards', 'Rec Yds': 'Receiving Yards',
+
+    # Receptions
+    'Receptions': 'Receptions', 'Total Receptions': 'Receptions', 'Reception': 'Receptions',
+
+    # Rushing Yards (FIXED)
+    'Rushing Yards': 'Rushing Yards', 'Rushing Yds': 'Rushing Yards', 'Rush Yards': 'Rushing Yards', 'Rush Yds': 'Rushing Yards',
+
+    # Rushing Attempts
+    'Rushing Attempts': 'Rushing Attempts', 'Rush Attempts': 'Rushing Attempts',
+
+    # Combo Props (Rushing + Receiving) (FIXED)
+    'Rushing + Receiving Yards': 'Rushing + Receiving Yards', 'Rushing + Receiving Yds': 'Rushing + Receiving Yards', 'Rush + Rec Yards': 'Rushing + Receiving Yards', 'Rush + Rec Yds': 'Rushing + Receiving Yards',
+
+    # Combo Props (Passing + Rushing) (FIXED)
+    'Passing + Rushing Yards': 'Passing + Rushing Yards', 'Passing + Rushing Yds': 'Passing + Rushing Yards', 'Pass + Rush Yards': 'Passing + Rushing Yards',
+
+    # Kicking
+    'Field Goals Made': 'Field Goals Made', 'FG Made': 'Field Goals Made',
+    'Kicking Points': 'Kicking Points', 'Kicking Pts': 'Kicking Points',
+    'Extra Points Made': 'Extra Points Made', 'PAT Made': 'Extra Points Made',
+
+    # Fantasy
+    'Fantasy Points': 'Fantasy Points', 'WR/TE Fantasy Points': 'Fantasy Points', 'RB Fantasy Points': 'Fantasy Points', 'QB Fantasy Points': 'Fantasy Points',
+}
+# --- END OF CORRECTIONS ---
+
+# Checked in this order; 'Longest' comes first because it used to be tested before the others.
+PROP_QUALIFIERS = {'Longest': 'Longest', ' - 1st Half': '1st Half', ' - 1H': '1st Half', ' - 1st Quarter': '1st Quarter', ' - 1Q': '1st Quarter', '1st Qtr': '1st Quarter'}
+PROP_QUALIFIER_PATTERN = re.compile('|'.join(re.escape(key) for key in PROP_QUALIFIERS))
+_PROP_QUALIFIER_PRIORITY = {key: rank for rank, key in enumerate(PROP_QUALIFIERS)}
+
+@lru_cache(maxsize=4096)
+def _parse_prop_string(prop_string):
+    if not prop_string:
+        return 'Unknown Prop', ''
+
+    prop_qualifier = 'Full Game'; main_prop_str = prop_string
+    found = PROP_QUALIFIER_PATTERN.findall(main_prop_str)
+    if found:
+        key = min(found, key=_PROP_QUALIFIER_PRIORITY.get)
+        prop_qualifier = PROP_QUALIFIERS[key]; main_prop_str = main_prop_str.replace(key, '').strip()
+    main_prop_str = main_prop_str.replace(' O/U', '').strip()
+    
+    # This line now correctly maps all variations to one canonical name
+    main_prop = PROP_TYPE_MAP.get(main_prop_str, main_prop_str) 
+    
+    if prop_qualifier == 'Longest':
+        if main_prop in ['Receiving Yards', 'Receptions']: main_prop = 'Longest Reception'
+        elif main_prop in ['Rushing Yards', 'Rush']: main_prop = 'Longest Rush'
+        elif main_prop in ['Passing Completions', 'Pass']: main_prop = 'Longest Completion'
+        prop_qualifier = ''
+    return main_prop, prop_qualifier
+
+def parse_prop_type(prop_string: str) -> dict:
+    main_prop, prop_qualifier = _parse_prop_string(str(prop_string).strip())
+    return {'main': main_prop, 'qualifier': prop_qualifier}
+
+def strip_player_from_prop(prop_string, player_name):
+    """DraftKings prop strings can start with the player's name; drop it so only the prop remains."""
+    prop_str, player_str = str(prop_string), str(player_name)
+    if prop_str.lower().startswith(player_str.lower()):
+        return prop_str[len(player_str):].strip()
+    return prop_str
+
+def parse_player_prop(prop_string, player_name):
+    """(prop_main, prop_qualifier) for one row, exactly as the app's cleaning derives them."""
+    return _parse_prop_string(strip_player_from_prop(prop_string, player_name).strip())
+
+_TRIE_END = '' # Never a real character, so it can mark the end of a name inside the trie
+
+def build_player_prefix_index(known_players):
+    """Lowercase prefix trie over the known player names, built once per load."""
+    prefix_index = {}
+    # Longest first, so on case-insensitive duplicates the name the old linear scan would have hit wins
+    for player in sorted(known_players, key=len, reverse=True):
+        node = prefix_index
+        for char in player.lower():
+            node = node.setdefault(char, {})
+        node.setdefault(_TRIE_END, player)
+    return prefix_index
+
+def extract_player_name(text, known_players, prefix_index=None):
+    """Returns the longest known player name that text starts with (case-insensitive), or text itself."""
+    text = str(text)
+    if prefix_index is None:
+        prefix_index = build_player_prefix_index(known_players)
+    node = prefix_index
+    best_match = node.get(_TRIE_END, '')
+    for char in text.lower():
+        node = node.get(char)
+        if node is None:
+            break
+        best_match = node.get(_TRIE_END, best_match)
+    return best_match if best_match else text
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+# --- Concurrent fetch engine for the scrapers ---
+# Runs many blocking fetches (the scrapers use requests) from an asyncio loop: a semaphore bounds how
+# many are in flight, a token bucket bounds how fast new ones start, and each result is handed to a
+# callback as soon as it arrives, so parsing overlaps with the remaining downloads.
+DEFAULT_CONCURRENCY = 6
+DEFAULT_RATE = 4.0 # Requests started per second, on average
+DEFAULT_BURST = 4 # Requests that may start back to back after an idle spell
+
+
+def make_token_bucket(rate, burst):
+    """Returns an async acquire() that waits until a token is free. Use it from a single event loop."""
+    state = {'tokens': float(burst), 'updated': time.monotonic()}
+    lock = asyncio.Lock()
+
+    async def acquire():
+        async with lock: # Waiters queue up in order instead of all waking at once
+            while True:
+                now = time.monotonic()
+                state['tokens'] = min(burst, state['tokens'] + (now - state['updated']) * rate)
+                state['updated'] = now
+                if state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return
+                await asyncio.sleep((1 - state['tokens']) / rate)
+    return acquire
+
+async def _run_jobs(jobs, fetch, on_result, concurrency, rate, burst):
+    semaphore = asyncio.Semaphore(concurrency)
+    acquire_token = make_token_bucket(rate, burst)
+
+    async def run(index, job):
+        async with semaphore:
+            await acquire_token()
+            started = time.monotonic()
+            payload = await asyncio.to_thread(fetch, *job)
+            on_result(index, job, payload, time.monotonic() - started)
+
+    await asyncio.gather(*(run(index, job) for index, job in enumerate(jobs)))
+
+def fetch_all(jobs, fetch, on_result, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """
+    Calls fetch(*job) for every job (a tuple of arguments) and on_result(index, job, payload, seconds)
+    as each one completes, in completion order; index is the job's position, for putting results back
+    in job order. Blocks until all jobs are done. Safe to call from any thread without a running loop.
+    """
+    asyncio.run(_run_jobs(jobs, fetch, on_result, concurrency, rate, burst))
+
+
+# --- (NEW) Adaptive worker pool ---
+# For books that push back: a fixed pool of workers shares one start rate that creeps up while
+# responses come back 200 (additive increase) and halves on a 429 or 5xx (multiplicative decrease),
+# with the throttled request put back on the queue. fetch(*job) must return (status, payload), status
+# being the HTTP code or None when no response came back.
+ADAPTIVE_SPEEDUP = 0.5 # Requests/second added to the rate after each 200
+ADAPTIVE_SLOWDOWN = 0.5 # Factor the rate is multiplied by after a throttled response
+MAX_THROTTLE_RETRIES = 3 # Times one job is re-queued after being throttled before it is given up
+
+
+def is_throttled(status):
+    return status == 429 or (status is not None and status >= 500)
+
+def make_adaptive_pacer(rate, min_rate, max_rate):
+    """Returns (acquire, report, current_rate): async start pacing, feedback per response, and the live rate."""
+    state = {'rate': float(rate), 'next_start': time.monotonic()}
+    lock = asyncio.Lock()
+
+    async def acquire():
+        async with lock:
+            wait = state['next_start'] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            state['next_start'] = max(state['next_start'], time.monotonic()) + 1 / state['rate']
+
+    def report(status):
+        if is_throttled(status):
+            state['rate'] = max(min_rate, state['rate'] * ADAPTIVE_SLOWDOWN)
+            # Back off right away as well, not only from the next scheduled start on
+            state['next_start'] = max(state['next_start'], time.monotonic() + 1 / state['rate'])
+        elif status == 200:
+            state['rate'] = min(max_rate, state['rate'] + ADAPTIVE_SPEEDUP)
+
+    return acquire, report, lambda: state['rate']
+
+async def _run_adaptive(jobs, fetch, on_result, workers, rate, min_rate, max_rate, describe, stats):
+    acquire, report, current_rate = make_adaptive_pacer(rate, min_rate, max_rate)
+    pending = asyncio.Queue()
+    for index, job in enumerate(jobs):
+        pending.put_nowait((index, job, 0))
+
+    async def worker():
+        while True:
+            try:
+                index, job, attempt = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return # Re-queued jobs are put back before their worker moves on, so none are missed
+            await acquire()
+            started = time.monotonic()
+            status, payload = await asyncio.to_thread(fetch, *job)
+            elapsed = time.monotonic() - started
+            report(status)
+            stats['requests'] += 1
+            if is_throttled(status) and attempt < MAX_THROTTLE_RETRIES:
+                stats['throttled'] += 1
+                print(f"  ⚠️ {describe(job)}: HTTP {status} after {elapsed * 1000:.0f} ms, "
+                      f"slowing to {current_rate():.2f} req/s and retrying ({attempt + 1}/{MAX_THROTTLE_RETRIES})")
+                pending.put_nowait((index, job, attempt + 1))
+                continue
+            print(f"  {describe(job)}: HTTP {status} in {elapsed * 1000:.0f} ms ({current_rate():.2f} req/s)")
+            on_result(index, job, payload if status == 200 else None, elapsed)
+
+    await asyncio.gather(*(worker() for _ in range(min(workers, len(jobs)))))
+    stats['final_rate'] = current_rate()
+
+def fetch_all_adaptive(jobs, fetch, on_result, workers=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                       min_rate=0.5, max_rate=10.0, describe=str):
+    """
+    Like fetch_all, but with a worker pool, adaptive pacing and retries of throttled jobs; on_result
+    gets None for a job that failed or stayed throttled. Logs every request's status and latency.
+    Returns {requests, throttled, final_rate}.
+    """
+    stats = {'requests': 0, 'throttled': 0, 'final_rate': rate}
+    asyncio.run(_run_adaptive(jobs, fetch, on_result, workers, rate, min_rate, max_rate, describe, stats))
+    return stats
@@ -1,12 +1,15 @@
 import requests
-import csv
 import os
 import time
-import random
 import re
 from collections import defaultdict
 from datetime import datetime
 
+import http_client
+import payload_state
+import sinks
+from fetch_engine import fetch_all_adaptive
+
 # --- CONFIGURATION ---
 REGION_CODE = "dkusoh"
 GAME_LINES_SUBCATEGORY_ID = 4518  # NFL game lines subcategory
@@ -24,19 +27,33 @@ LONGEST_PROP_SUBCATEGORIES = {
     'Longest Passing Completion': '9526'
 }
 
+# (NEW) Store only change events for player props (see history_events.py). Weeks that already have an
+# *_events.csv keep being compacted either way.
+COMPACT_PROPS_HISTORY = False
+
+# (NEW) Prop subcategories are fetched by a small worker pool whose pace adapts to DraftKings'
+# responses (see fetch_engine.py), instead of one by one with a random 1.5-3s sleep in between
+FETCH_WORKERS = 4
+FETCH_START_RATE = 2.0 # Requests started per second before any feedback
+FETCH_MIN_RATE = 0.3 # Floor the rate backs off to under sustained 429s/5xx
+FETCH_MAX_RATE = 8.0
+
+# (NEW) Skip parsing and writing subcategories whose payload is byte-identical to the last scrape's (see payload_state.py)
+SKIP_UNCHANGED_PAYLOADS = True
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36",
+    "Referer": "https://sportsbook.draftkings.com/",
+    "Origin": "https://sportsbook.draftkings.com",
+    "Accept": "*/*",
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
 def create_fresh_session():
-    """Create a new session with fresh headers to avoid caching"""
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36",
-        "Referer": "https://sportsbook.draftkings.com/",
-        "Origin": "https://sportsbook.draftkings.com",
-        "Accept": "*/*",
-        "Cache-Control": "no-cache, no-store, must-revalidate",
-        "Pragma": "no-cache",
-        "Expires": "0",
-    })
-    return session
+    """Create a new session with fresh headers to avoid caching (pooled, one connection per fetch worker)"""
+    return http_client.create_session(HEADERS, pool_size=FETCH_WORKERS)
 
 # ============================================================
 # 🏈 GAME LINES FETCH + PARSE (Merged from your working snippet)
@@ -61,7 +78,7 @@ def fetch_game_lines(session):
 
     print("\nFetching NFL game lines from DraftKings...")
     try:
-        response = session.get(url, timeout=30)
+        response = http_client.get(session, url)
         response.raise_for_status()
         data = response.json()
         print("  ✅ Game lines data received successfully.")
@@ -161,11 +178,26 @@ def parse_game_lines(data):
 # 🧠 PLAYER PROPS FUNCTIONS (unchanged from your main script)
 # ============================================================
 
+def get_payload(session, url):
+    """
+    (NEW) GETs a JSON endpoint. Returns (status, raw body); both are None if no response came back, and the
+    body is None for a non-200. Only transport failures are retried here: 429s and 5xx go back to the
+    adaptive pool, which paces itself on them.
+    """
+    try:
+        response = http_client.get(session, url, retry_statuses=())
+    except requests.exceptions.RequestException as e:
+        print(f"  ❌ Request failed: {e}")
+        return None, None
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, response.content
+
 # <<< NEW: Generic function to fetch props from the direct market-style endpoints
 def fetch_direct_prop_data(session, subcategory_id, prop_name):
     """
     Fetches prop data from a direct subcategory endpoint that returns
-    events, markets, and selections directly.
+    events, markets, and selections directly. Returns (status, raw body).
     """
     # --- MODIFIED: Added cache-buster ---
     cache_buster = int(time.time() * 1000)
@@ -178,16 +210,7 @@ def fetch_direct_prop_data(session, subcategory_id, prop_name):
         f"&include=Events&entity=events"
         f"&_={cache_buster}"  # <-- Cache-buster added here
     )
-    print(f"Fetching '{prop_name}' props from DraftKings...")
-    try:
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        print(f"  ✅ '{prop_name}' data received successfully.")
-        return data
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ Error fetching '{prop_name}': {e}")
-        return None
+    return get_payload(session, url)
 
 def find_subcategories_in_response(data):
     if isinstance(data, dict):
@@ -213,7 +236,7 @@ def get_prop_subcategories(session, category_name, category_id):
     
     print(f"\nDiscovering subcategories for '{category_name}'...")
     try:
-        response = session.get(url, timeout=30)
+        response = http_client.get(session, url)
         response.raise_for_status()
         data = response.json()
         subcategories = find_subcategories_in_response(data)
@@ -229,13 +252,13 @@ def fetch_subcategory_data(session, category_id, sub_id):
     # --- MODIFIED: Added cache-buster ---
     cache_buster = int(time.time() * 1000)
     url = f"https://sportsbook-nash.draftkings.com/api/sportscontent/{REGION_CODE}/v1/leagues/88808/categories/{category_id}/subcategories/{sub_id}?format=json&_={cache_buster}"
-    
-    try:
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException:
-        return None
+    return get_payload(session, url)
+
+def fetch_prop_job(session, category_id, sub_id, prop_name):
+    """One prop fetch job for the worker pool: a Player Props subcategory, or a direct one when category_id is None."""
+    if category_id is None:
+        return fetch_direct_prop_data(session, sub_id, prop_name)
+    return fetch_subcategory_data(session, category_id, sub_id)
 
 def parse_prop_data(data, prop_type_name):
     if not data:
@@ -324,22 +347,46 @@ def run_scraper(week_number):
     passing_category_id = PLAYER_PROP_CATEGORIES['Passing']
     all_subs = get_prop_subcategories(session, "Player Props", passing_category_id)
 
-    for sub in all_subs:
-        data = fetch_subcategory_data(session, sub['categoryId'], sub['id'])
-        if data:
-            props = parse_prop_data(data, sub['name'])
-            all_props.extend(props)
-            print(f"  -> Found {len(props)} {sub['name']} props")
-        time.sleep(random.uniform(1.5, 3.0))
+    # (NEW) The O/U subcategories and the 'Longest' ones go through one adaptive worker pool
+    prop_jobs = [(sub['categoryId'], sub['id'], sub['name']) for sub in all_subs]
+    prop_jobs += [(None, sub_id, prop_name) for prop_name, sub_id in LONGEST_PROP_SUBCATEGORIES.items()]
+    print(f"Fetching {len(prop_jobs)} prop subcategories ({FETCH_WORKERS} workers, starting at {FETCH_START_RATE} req/s)...")
+
+    # (NEW) Payload hashes from the last scrape; None when skipping is off
+    props_file = os.path.join(week_dir, f"draftkings_nfl_week_{week_number}_props_history.csv")
+    state_file, payload_hashes = sinks.load_payload_hashes(week_dir, 'draftkings', props_file) \
+        if SKIP_UNCHANGED_PAYLOADS else (None, None)
+    written_digests, payload_counts = {}, defaultdict(int)
 
-    print("\n--- Fetching 'Longest' Player Props ---")
-    for prop_name, sub_id in LONGEST_PROP_SUBCATEGORIES.items():
-        data = fetch_direct_prop_data(session, sub_id, prop_name)
+    props_by_job = [None] * len(prop_jobs)
+    def on_prop_data(index, job, content, seconds):
+        if content is None:
+            return
+        if payload_hashes is not None:
+            key = f"{job[0] or 'direct'}/{job[1]}"
+            reason, digest = payload_state.check_payload(payload_hashes, key, content)
+            payload_counts[reason] += 1
+            if reason == 'unchanged':
+                return
+            written_digests[key] = digest
+        data = payload_state.decode(content)
         if data:
-            props = parse_prop_data(data, prop_name)
+            props_by_job[index] = parse_prop_data(data, job[2])
+
+    fetch_started = time.time()
+    fetch_stats = fetch_all_adaptive(prop_jobs, lambda *job: fetch_prop_job(session, *job), on_prop_data,
+                                     workers=FETCH_WORKERS, rate=FETCH_START_RATE, min_rate=FETCH_MIN_RATE,
+                                     max_rate=FETCH_MAX_RATE, describe=lambda job: job[2])
+    print(f"  Fetched {len(prop_jobs)} subcategories in {time.time() - fetch_started:.1f}s "
+          f"({fetch_stats['requests']} requests, {fetch_stats['throttled']} throttled, ending at {fetch_stats['final_rate']:.2f} req/s)")
+    if payload_hashes is not None:
+        print(f"  Payloads: {payload_counts['unchanged']} unchanged (skipped), {payload_counts['changed']} changed, "
+              f"{payload_counts['new']} new, {payload_counts['heartbeat']} heartbeat")
+
+    for (_, _, prop_name), props in zip(prop_jobs, props_by_job): # Same order as the sequential scraper
+        if props is not None:
             all_props.extend(props)
             print(f"  -> Found {len(props)} {prop_name} props")
-        time.sleep(random.uniform(1.5, 3.0))
 
     # --- MODIFIED: Add timestamp to all new data before saving ---
     scrape_time = datetime.now().isoformat()
@@ -352,45 +399,29 @@ def run_scraper(week_number):
 
     # --- 3️⃣ Save All Props and Lines to CSV ---
     
-    # --- MODIFIED: Helper function for appending ---
-    def append_to_historical_csv(new_data, output_file, default_fieldnames):
-        """Appends new data to a CSV, writing a header if the file is new."""
-        if not new_data:
-            print(f"No new data to write for {output_file}.")
-            return
-            
-        # Add timestamp to the fieldnames
-        fieldnames = default_fieldnames + ['scrape_timestamp']
-        file_exists = os.path.exists(output_file)
-        
-        try:
-            with open(output_file, "a", newline="", encoding="utf-8") as f:
-                # Use extrasaction='ignore' to be safe with any column mismatches
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                if not file_exists:
-                    writer.writeheader()  # Write header only if file is new
-                writer.writerows(new_data)
-            print(f"  Appended {len(new_data)} new rows to {output_file}")
-        except Exception as e:
-             print(f"  ERROR writing file {output_file}: {e}")
-
     # --- MODIFIED: 1. Append Player Props ---
+    props_written = True # Nothing to write counts as written
     if all_props:
-        props_file = os.path.join(week_dir, f"draftkings_nfl_week_{week_number}_props_history.csv")
         props_fieldnames = ['week', 'game', 'player_name', 'prop_type', 'line', 'over_odds', 'under_odds', 'sportsbook']
-        append_to_historical_csv(all_props, props_file, props_fieldnames)
+        props_written = sinks.write_scrape(all_props, props_file, props_fieldnames, base_dir, week_number, 'draftkings',
+                                           'props', compact=COMPACT_PROPS_HISTORY)
     else:
         print("\n  ⚠️ No new player props found.")
 
+    # (NEW) Remember what was just written (not after a failed write), so identical payloads are skipped next time
+    if payload_hashes is not None and props_written:
+        sinks.save_payload_hashes(state_file, payload_hashes, written_digests)
+
     # --- MODIFIED: 2. Append Game Lines ---
     if parsed_lines:
         lines_file = os.path.join(week_dir, f"draftkings_nfl_week_{week_number}_game_lines_history.csv")
         lines_fieldnames = ['game', 'away_team', 'home_team', 'spread', 'spread_odds', 'total_line', 'total_odds', 'moneyline']
-        append_to_historical_csv(parsed_lines, lines_file, lines_fieldnames)
+        sinks.write_scrape(parsed_lines, lines_file, lines_fieldnames, base_dir, week_number, 'draftkings', 'game_lines')
     else:
         print("\n  ⚠️ No new game lines found.")
 
     print("\n✅ DraftKings scraping complete!")
+    return dict(payload_counts) # (NEW) For the scheduler: how many prop payloads changed since the last run
 
 if __name__ == "__main__":
     # This block now runs ONLY if you run this file directly
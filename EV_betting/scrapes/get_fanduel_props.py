@@ -1,26 +1,49 @@
 import requests
 import json
 import time
-import csv
 import os
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
-def get_nfl_main_page_data():
+import http_client
+import payload_state
+import sinks
+from fetch_engine import fetch_all
+
+# (NEW) Store only change events for player props (see history_events.py). Weeks that already have an
+# *_events.csv keep being compacted either way.
+COMPACT_PROPS_HISTORY = False
+
+# (NEW) Event prop tabs are fetched concurrently (see fetch_engine.py) instead of one at a time with a
+# fixed 0.5s pause, so a full slate's snapshot is taken within seconds rather than minutes
+PROP_TABS = ["passing-props", "receiving-props", "rushing-props"]
+FETCH_CONCURRENCY = 6 # Tab requests in flight at once
+FETCH_RATE = 4.0 # Tab requests started per second (token bucket refill)
+FETCH_BURST = 4 # Token bucket size
+
+# (NEW) Skip parsing and writing event tabs whose payload is byte-identical to the last scrape's (see payload_state.py)
+SKIP_UNCHANGED_PAYLOADS = True
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36',
+    'x-sportsbook-region': 'OH',
+    'Cache-Control': 'no-cache, no-store, must-revalidate',  # Add this
+    'Pragma': 'no-cache',  # Add this
+    'Expires': '0'  # Add this
+}
+
+def create_session():
+    """(NEW) One pooled keep-alive session per scrape, with a connection for each concurrent tab fetch."""
+    return http_client.create_session(HEADERS, pool_size=FETCH_CONCURRENCY)
+
+def get_nfl_main_page_data(session):
     """Fetches the main NFL page and returns the raw data needed for parsing."""
     
     # --- MODIFIED: Added cache-buster ---
     cache_buster = int(time.time())
     url = f"https://api.sportsbook.fanduel.com/sbapi/content-managed-page?page=CUSTOM&customPageId=nfl&pbHorizontal=false&_ak=FhMFpcPWXMeyZxOx&timezone=America%2FNew_York&_={cache_buster}"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36',
-        'x-sportsbook-region': 'OH',
-        'Cache-Control': 'no-cache, no-store, must-revalidate',  # Add this
-        'Pragma': 'no-cache',  # Add this
-        'Expires': '0'  # Add this
-    }
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(session, url)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -28,21 +51,14 @@ def get_nfl_main_page_data():
         return None
 
 
-def get_player_props(event_id, prop_tab):
-    """Fetches the player props for a specific game (event_id) and prop tab."""
+def get_player_props(session, event_id, prop_tab):
+    """Fetches the player props for a specific game (event_id) and prop tab. Returns the raw JSON body, or None."""
     cache_buster = int(time.time())
     url = f"https://api.sportsbook.fanduel.com/sbapi/event-page?_ak=FhMFpcPWXMeyZxOx&eventId={event_id}&tab={prop_tab}&_={cache_buster}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36',
-        'x-sportsbook-region': 'OH',
-        'Cache-Control': 'no-cache, no-store, must-revalidate',  # Add this
-        'Pragma': 'no-cache',  # Add this
-        'Expires': '0'  # Add this
-    }
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(session, url)
         response.raise_for_status()
-        return response.json()
+        return response.content
     except requests.exceptions.RequestException:
         return None
 
@@ -101,12 +117,48 @@ def get_upcoming_nfl_games(main_page_data):
     return upcoming_events
 
 
+def parse_player_props(prop_data, week_number, game_name):
+    """Turns one event tab's payload into prop rows (without the scrape timestamp)."""
+    props = []
+    if not prop_data or 'attachments' not in prop_data or 'markets' not in prop_data['attachments']:
+        return props
+
+    for market in prop_data['attachments']['markets'].values():
+        if " - " not in market.get('marketName', ''):
+            continue
+        player_name, prop_type = market['marketName'].rsplit(' - ', 1)
+        runners = market.get('runners', [])
+        if len(runners) != 2:
+            continue
+
+        over_runner = next((r for r in runners if r.get('result', {}).get('type') == 'OVER'), None)
+        under_runner = next((r for r in runners if r.get('result', {}).get('type') == 'UNDER'), None)
+        if not over_runner or not under_runner:
+            continue
+
+        logo_url = over_runner.get('secondaryLogo', '')
+        props.append({
+            'week': week_number,
+            'game': game_name,
+            'player_name': player_name,
+            'team_name': extract_team_name_from_logo(logo_url),
+            'team_logo': logo_url,
+            'prop_type': prop_type,
+            'line': over_runner.get('handicap'),
+            'over_odds': over_runner.get('winRunnerOdds', {}).get('americanDisplayOdds', {}).get('americanOdds') if over_runner else None,
+            'under_odds': under_runner.get('winRunnerOdds', {}).get('americanDisplayOdds', {}).get('americanOdds') if under_runner else None,
+            'sportsbook': 'FanDuel'
+        })
+    return props
+
+
 def run_scraper(week_number):
     # This function now accepts 'week_number' as an argument
     # The input() call has been removed
 
     print("\nFetching all upcoming NFL games...")
-    main_page_data = get_nfl_main_page_data()
+    session = create_session()
+    main_page_data = get_nfl_main_page_data(session)
     if not main_page_data:
         print("Could not fetch main page data. Exiting.")
         return
@@ -120,6 +172,7 @@ def run_scraper(week_number):
 
     markets_data = main_page_data.get('attachments', {}).get('markets', {})
     all_props_data, all_game_lines_data = [], []
+    prop_jobs, prop_job_games = [], [] # (event_id, tab) per request, and the game it belongs to
 
     for event, market_ids in upcoming_events:
         event_id, game_name = event['eventId'], event['name']
@@ -160,39 +213,46 @@ def run_scraper(week_number):
                 })
         all_game_lines_data.append(game_line)
 
-        # Scrape Player Props
-        for tab_key in ["passing-props", "receiving-props", "rushing-props"]:
-            prop_data = get_player_props(event_id, tab_key)
-            if not prop_data or 'attachments' not in prop_data or 'markets' not in prop_data['attachments']:
-                continue
+        # Player props are fetched below, all events' tabs at once
+        for tab_key in PROP_TABS:
+            prop_jobs.append((event_id, tab_key))
+            prop_job_games.append(game_name)
 
-            for market in prop_data['attachments']['markets'].values():
-                if " - " not in market.get('marketName', ''):
-                    continue
-                player_name, prop_type = market['marketName'].rsplit(' - ', 1)
-                runners = market.get('runners', [])
-                if len(runners) != 2:
-                    continue
-
-                over_runner = next((r for r in runners if r.get('result', {}).get('type') == 'OVER'), None)
-                under_runner = next((r for r in runners if r.get('result', {}).get('type') == 'UNDER'), None)
-                if not over_runner or not under_runner:
-                    continue
-
-                logo_url = over_runner.get('secondaryLogo', '')
-                all_props_data.append({
-                    'week': week_number,
-                    'game': game_name,
-                    'player_name': player_name,
-                    'team_name': extract_team_name_from_logo(logo_url),
-                    'team_logo': logo_url,
-                    'prop_type': prop_type,
-                    'line': over_runner.get('handicap'),
-                    'over_odds': over_runner.get('winRunnerOdds', {}).get('americanDisplayOdds', {}).get('americanOdds') if over_runner else None,
-                    'under_odds': under_runner.get('winRunnerOdds', {}).get('americanDisplayOdds', {}).get('americanOdds') if under_runner else None,
-                    'sportsbook': 'FanDuel'
-                })
-            time.sleep(0.5)
+    # --- MODIFIED: Write to week_{week_number} subfolder ---
+    base_dir = "nfl_data"
+    week_dir = os.path.join(base_dir, f"week_{week_number}")
+    os.makedirs(week_dir, exist_ok=True)
+    props_file = os.path.join(week_dir, f"fanduel_nfl_week_{week_number}_props_history.csv")
+
+    # (NEW) Payload hashes from the last scrape; None when skipping is off
+    state_file, payload_hashes = sinks.load_payload_hashes(week_dir, 'fanduel', props_file) \
+        if SKIP_UNCHANGED_PAYLOADS else (None, None)
+    written_digests, payload_counts = {}, defaultdict(int)
+
+    # --- (NEW) Scrape Player Props: concurrent fetches, each tab parsed as soon as it arrives ---
+    print(f"\nFetching {len(prop_jobs)} player prop tabs ({FETCH_CONCURRENCY} at a time)...")
+    props_by_job = [[] for _ in prop_jobs]
+    def on_prop_tab(index, job, content, seconds):
+        if content is None:
+            return
+        if payload_hashes is not None:
+            key = '/'.join(str(part) for part in job)
+            reason, digest = payload_state.check_payload(payload_hashes, key, content)
+            payload_counts[reason] += 1
+            if reason == 'unchanged':
+                return
+            written_digests[key] = digest
+        props_by_job[index] = parse_player_props(payload_state.decode(content), week_number, prop_job_games[index])
+
+    fetch_started = time.time()
+    fetch_all(prop_jobs, lambda *job: get_player_props(session, *job), on_prop_tab,
+              concurrency=FETCH_CONCURRENCY, rate=FETCH_RATE, burst=FETCH_BURST)
+    print(f"  Fetched and parsed all prop tabs in {time.time() - fetch_started:.1f}s")
+    if payload_hashes is not None:
+        print(f"  Payloads: {payload_counts['unchanged']} unchanged (skipped), {payload_counts['changed']} changed, "
+              f"{payload_counts['new']} new, {payload_counts['heartbeat']} heartbeat")
+    for job_props in props_by_job: # Back in game/tab order, as the sequential scraper wrote them
+        all_props_data.extend(job_props)
 
     # --- MODIFIED: Add timestamp to all new data before saving ---
     scrape_time = datetime.now().isoformat()
@@ -201,43 +261,21 @@ def run_scraper(week_number):
     for line in all_game_lines_data:
         line['scrape_timestamp'] = scrape_time
 
-    # --- MODIFIED: Write to week_{week_number} subfolder ---
-    base_dir = "nfl_data"
-    week_dir = os.path.join(base_dir, f"week_{week_number}")
-    os.makedirs(week_dir, exist_ok=True)
-
-    # --- MODIFIED: Helper function for appending ---
-    def append_to_historical_csv(new_data, output_file, default_fieldnames):
-        """Appends new data to a CSV, writing a header if the file is new."""
-        if not new_data:
-            print(f"No new data to write for {output_file}.")
-            return
-            
-        # Add timestamp to the fieldnames
-        fieldnames = default_fieldnames + ['scrape_timestamp']
-        file_exists = os.path.exists(output_file)
-        
-        try:
-            with open(output_file, "a", newline="", encoding="utf-8") as f:
-                # Use extrasaction='ignore' to be safe with any column mismatches
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                if not file_exists:
-                    writer.writeheader()  # Write header only if file is new
-                writer.writerows(new_data)
-            print(f"  Appended {len(new_data)} new rows to {output_file}")
-        except Exception as e:
-             print(f"  ERROR writing file {output_file}: {e}")
-
     # --- MODIFIED: 1. Append Player Props ---
+    props_written = True # Nothing to write counts as written
     if all_props_data:
-        props_file = os.path.join(week_dir, f"fanduel_nfl_week_{week_number}_props_history.csv")
         # Define fieldnames *without* timestamp (it's added by the helper)
         props_fieldnames = ['week', 'game', 'player_name', 'team_name', 'team_logo', 
                             'prop_type', 'line', 'over_odds', 'under_odds', 'sportsbook']
-        append_to_historical_csv(all_props_data, props_file, props_fieldnames)
+        props_written = sinks.write_scrape(all_props_data, props_file, props_fieldnames, base_dir, week_number, 'fanduel',
+                                           'props', compact=COMPACT_PROPS_HISTORY)
     else:
         print("\nNo new player props found.")
 
+    # (NEW) Remember what was just written (not after a failed write), so identical payloads are skipped next time
+    if payload_hashes is not None and props_written:
+        sinks.save_payload_hashes(state_file, payload_hashes, written_digests)
+
     # --- MODIFIED: 2. Append Game Lines ---
     if all_game_lines_data:
         lines_file = os.path.join(week_dir, f"fanduel_nfl_week_{week_number}_game_lines_history.csv")
@@ -245,11 +283,12 @@ def run_scraper(week_number):
                             'away_spread_odds', 'home_spread_line', 'home_spread_odds', 
                             'away_moneyline', 'home_moneyline', 'total_line', 
                             'over_odds', 'under_odds']
-        append_to_historical_csv(all_game_lines_data, lines_file, lines_fieldnames)
+        sinks.write_scrape(all_game_lines_data, lines_file, lines_fieldnames, base_dir, week_number, 'fanduel', 'game_lines')
     else:
         print("\nNo new game lines found.")
 
     print("\n✅ Scraping complete! Files saved in:", week_dir)
+    return dict(payload_counts) # (NEW) For the scheduler: how many prop payloads changed since the last run
 
 
 if __name__ == "__main__":
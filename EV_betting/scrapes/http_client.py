@@ -0,0 +1,70 @@
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Shared HTTP client for the scrapers ---
+# One keep-alive Session per scrape, with its connection pool sized to the scraper's fetch concurrency
+# so concurrent requests reuse warm TCP/TLS connections instead of opening a new one each. get() adds a
+# per-call timeout and retries connection errors, timeouts and retryable statuses a bounded number of
+# times with jittered exponential backoff.
+DEFAULT_POOL_SIZE = 6
+DEFAULT_TIMEOUT = (5, 30) # Seconds: (connect, read)
+MAX_RETRIES = 3 # Retries after the first attempt
+BACKOFF_BASE = 0.5 # Seconds; attempt n waits a random 0..BACKOFF_BASE * 2**n (capped)
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Response compression: gzip/deflate always; Brotli when the optional decoder urllib3 uses is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+def create_session(headers=None, pool_size=DEFAULT_POOL_SIZE, compress=True):
+    """
+    A Session whose pool keeps up to pool_size connections per host alive. Requests beyond that wait
+    for a free connection rather than opening throwaway ones. compress=False asks for identity bodies.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(headers or {})
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING if compress else 'identity'
+    return session
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt + 1: the server's Retry-After if it sent one, else full jitter."""
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+        except ValueError:
+            pass # An HTTP date; fall back to our own backoff
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def get(session, url, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES, retry_statuses=RETRY_STATUSES, **kwargs):
+    """
+    session.get with a timeout and bounded retries. Returns the last response, whatever its status;
+    raises the last requests exception if no attempt got a response. Pass retry_statuses=() to only
+    retry transport failures (e.g. when a caller paces itself on 429s).
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        if response.status_code not in retry_statuses or attempt == retries:
+            return response
+        response.close() # Hand the connection back to the pool before sleeping
+        time.sleep(backoff_delay(attempt, response.headers.get('Retry-After')))
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+# --- Unchanged-payload skipping ---
+# Each fetched prop payload (a FanDuel event tab, a DraftKings subcategory) is hashed before it is decoded
+# and compared with the hash from the previous scrape, kept in nfl_data/week_N/<book>_payload_state.json.
+# A byte-identical payload is neither parsed nor written: its props' latest rows are already on disk.
+# At most once per HEARTBEAT_INTERVAL it is written anyway, as a heartbeat showing the props are still
+# listed (history_events.py turns such repeats into heartbeat events when compacting).
+STATE_FILE_TEMPLATE = '{book}_payload_state.json'
+HEARTBEAT_INTERVAL = timedelta(hours=6) # None: never re-write an unchanged payload
+
+
+def state_path(week_dir, book):
+    return os.path.join(week_dir, STATE_FILE_TEMPLATE.format(book=book))
+
+def payload_digest(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def load_state(path, output_files):
+    """
+    {payload key: {'digest', 'written_at'}} from the last scrape. Empty if the file is missing or
+    unreadable, or if none of output_files exists (skipped payloads would have no rows to fall back on).
+    """
+    if not any(os.path.exists(f) for f in output_files):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(path, state):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def check_payload(state, key, content, now=None, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    Decides whether a payload must be parsed and written: returns (reason, digest) with reason one of
+    'new', 'changed', 'heartbeat' or 'unchanged' (skip). Call mark_written once its rows are saved.
+    """
+    digest = payload_digest(content)
+    previous = state.get(key)
+    if previous is None:
+        return 'new', digest
+    if previous['digest'] != digest:
+        return 'changed', digest
+    if heartbeat_interval is not None:
+        now = now or datetime.now()
+        if now - datetime.fromisoformat(previous['written_at']) >= heartbeat_interval:
+            return 'heartbeat', digest
+    return 'unchanged', digest
+
+def mark_written(state, key, digest, now=None):
+    state[key] = {'digest': digest, 'written_at': (now or datetime.now()).isoformat(timespec='seconds')}
+
+def decode(content):
+    """The payload's JSON, or None if it is not valid JSON."""
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
@@ -1,25 +1,277 @@
+import argparse
+import json
+import os
 import threading
 import sys
 import time
+from datetime import date, datetime, timedelta, timezone
 
 # --- 1. Import the refactored main functions from your scrapers ---
 try:
+    import sinks # Makes the storage modules next to app.py (EV_betting/) importable, for the scrapers and below
     from get_fanduel_props import run_scraper as run_fanduel
     from get_draftkings_props import run_scraper as run_draftkings
+    import get_fanduel_props
 except ImportError as e:
     print(f"Error: Could not import scraper functions: {e}")
     print("Please ensure 'get_fanduel_props.py' and 'get_draftkings_props.py' are in the same directory.")
     print("Also, make sure you have applied the modifications from Step 2 and 3.")
     sys.exit(1)
 
-def main():
-    # --- 2. Get the week number ONCE ---
+BASE_DIR = "nfl_data"
+SCRAPERS = {'fanduel': run_fanduel, 'draftkings': run_draftkings}
+
+# --- (NEW) Daemon mode ---
+# `python scrape_all.py --daemon` keeps both books scraped without a wrapper loop. The week comes from the
+# kickoff times in FanDuel's event list, and each book's worker thread scrapes more often as the next
+# kickoff nears, which is when lines actually move. A book whose last scrape found every payload
+# unchanged waits QUIET_STRETCH times longer (up to BASE_INTERVAL). Lock files keep runs of the same
+# book from overlapping, also across processes, and every run's timing lands in STATUS_FILE_NAME.
+BASE_INTERVAL = timedelta(hours=1) # Early in the week
+CADENCE = [ # (next kickoff within, scrape every), tightest first
+    (timedelta(hours=3), timedelta(minutes=3)),
+    (timedelta(hours=12), timedelta(minutes=10)),
+    (timedelta(hours=36), timedelta(minutes=30)),
+]
+QUIET_STRETCH = 2
+PLAN_MAX_AGE = timedelta(minutes=2) # The event list is re-fetched at most this often
+IDLE_RECHECK = timedelta(hours=6) # No upcoming games (bye, offseason)
+WEEK_START_HOUR_UTC = 12 # Weeks run Tuesday to Monday; Tuesday noon UTC is after every Monday night game
+LOCK_STALE_AFTER = timedelta(minutes=30) # A lock older than this is from a crashed run
+STATUS_FILE_NAME = 'scraper_status.json'
+
+_status_lock = threading.Lock()
+_snapshot_lock = threading.Lock()
+_plan = {'fetched_at': None, 'plan': None}
+_plan_lock = threading.Lock()
+
+
+def season_week_one_start(year):
+    """Tuesday after Labor Day (the first Monday of September), when week 1 begins."""
+    first_september = date(year, 9, 1)
+    labor_day = first_september + timedelta(days=(7 - first_september.weekday()) % 7)
+    return datetime(year, 9, labor_day.day + 1, WEEK_START_HOUR_UTC, tzinfo=timezone.utc)
+
+def nfl_week_of(kickoff):
+    """The NFL week a kickoff (aware datetime) belongs to, counted from the season's week 1."""
+    season = kickoff.year if kickoff.month >= 3 else kickoff.year - 1 # Same rule as odds_store.nfl_season
+    return (kickoff - season_week_one_start(season)).days // 7 + 1
+
+def kickoff_times(main_page_data):
+    """Kickoff times (UTC) of the games in FanDuel's upcoming event list."""
+    kickoffs = []
+    for event, _ in get_fanduel_props.get_upcoming_nfl_games(main_page_data):
+        open_time = event.get('openTime')
+        if not open_time:
+            continue
+        try:
+            kickoffs.append(datetime.fromisoformat(open_time.replace('Z', '+00:00')))
+        except ValueError:
+            continue
+    return kickoffs
+
+def make_plan(kickoffs, now):
+    """{week, next_kickoff} from the earliest game that has not kicked off yet, or None if there is none."""
+    upcoming = sorted(k for k in kickoffs if k > now)
+    if not upcoming:
+        return None
+    return {'week': nfl_week_of(upcoming[0]), 'next_kickoff': upcoming[0]}
+
+def current_plan(week_override=None):
+    """The shared schedule plan, re-fetched from FanDuel when older than PLAN_MAX_AGE."""
+    with _plan_lock:
+        now = datetime.now(timezone.utc)
+        if _plan['fetched_at'] is None or now - _plan['fetched_at'] > PLAN_MAX_AGE:
+            main_page_data = get_fanduel_props.get_nfl_main_page_data(get_fanduel_props.create_session())
+            if main_page_data is not None: # Keep the previous plan through a failed fetch
+                _plan['plan'] = make_plan(kickoff_times(main_page_data), now)
+                _plan['fetched_at'] = now
+        plan = _plan['plan']
+    if plan is not None and week_override is not None:
+        plan = {**plan, 'week': week_override}
+    return plan
+
+def next_interval(until_kickoff, quiet):
+    """(wait, reason): the book's cadence for this distance to kickoff, cut short where a tighter tier begins."""
+    interval = BASE_INTERVAL
+    tier_begins_in = None
+    for within, every in CADENCE:
+        if until_kickoff <= within:
+            interval = every
+            break
+        tier_begins_in = until_kickoff - within # Tiers are tightest first: the last one passed is the nearest
+    if quiet:
+        interval = min(interval * QUIET_STRETCH, max(interval, BASE_INTERVAL))
+    if tier_begins_in is not None and tier_begins_in < interval:
+        return tier_begins_in, 'cadence tightens'
+    return interval, 'quiet' if quiet else 'cadence'
+
+
+# --- (NEW) Run bookkeeping: overlap locks and the status file ---
+def lock_path(book):
+    return os.path.join(BASE_DIR, f".scrape_{book}.lock")
+
+def acquire_run_lock(book):
+    """Creates the book's lock file. False if another run holds it (a lock older than LOCK_STALE_AFTER is taken over)."""
+    path = lock_path(book)
+    os.makedirs(BASE_DIR, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except OSError:
+                continue # Released meanwhile
+            if age < LOCK_STALE_AFTER.total_seconds():
+                return False
+            print(f"  Removing stale {book} lock ({age / 60:.0f} min old)")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{os.getpid()} {datetime.now().isoformat(timespec='seconds')}\n")
+        return True
+    return False
+
+def release_run_lock(book):
+    try:
+        os.remove(lock_path(book))
+    except OSError:
+        pass
+
+def status_path():
+    return os.path.join(BASE_DIR, STATUS_FILE_NAME)
+
+def read_status():
+    try:
+        with open(status_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'books': {}}
+
+def update_status(book=None, increment=(), **fields):
+    """
+    Merges fields into the status file (into the book's entry when book is given), atomically. Counters
+    named in increment are bumped by one under the same lock, so concurrent workers never lose a count.
+    """
+    with _status_lock:
+        status = read_status()
+        target = status.setdefault('books', {}).setdefault(book, {}) if book else status
+        target.update(fields)
+        for counter in increment:
+            target[counter] = target.get(counter, 0) + 1
+        status['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        os.makedirs(BASE_DIR, exist_ok=True)
+        tmp_path = f"{status_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=1, default=str)
+        os.replace(tmp_path, status_path())
+
+def refresh_snapshot(week_number):
+    """Refreshes the dashboard's memory-mapped week snapshot, if that mode is on."""
     try:
-        week_number_str = input("Enter the current NFL week number (e.g., 7): ")
-        week_number = int(week_number_str)
-    except ValueError:
-        print("Invalid week number. Please enter a whole number.")
-        return
+        import week_snapshots # From sinks.APP_DIR
+        with _snapshot_lock: # Both books' workers may finish at once
+            if week_snapshots.refresh_if_enabled([week_number]):
+                print(f"Week {week_number} snapshot refreshed for the dashboard workers.")
+    except Exception as e:
+        print(f"❌ Snapshot refresh FAILED: {e}")
+
+def run_book(book, week_number):
+    """
+    One locked, timed scrape of a book. Returns the scraper's payload counts ({} if it reported none),
+    or None if the run was skipped because another one is still going or it failed.
+    """
+    if not acquire_run_lock(book):
+        print(f"[{book}] ⏭️ Previous run still in progress; skipping this one.")
+        update_status(book, increment=('skipped_overlaps',))
+        return None
+    started = time.time()
+    update_status(book, state='running', week=week_number, last_started=datetime.now().isoformat(timespec='seconds'))
+    counts, error = None, None
+    try:
+        counts = SCRAPERS[book](week_number) or {}
+    except Exception as e:
+        error = str(e)
+    finally:
+        release_run_lock(book)
+    duration = round(time.time() - started, 1)
+    update_status(book, increment=('runs',), state='idle', last_finished=datetime.now().isoformat(timespec='seconds'),
+                  last_duration_s=duration, last_ok=error is None, last_error=error, payloads=counts)
+    if error is not None:
+        print(f"[{book}] ❌ Scraper FAILED after {duration}s: {error}")
+    else:
+        print(f"[{book}] ✅ Scraper finished in {duration}s.")
+    return counts
+
+
+def book_worker(book, stop_event, week_override=None):
+    """Daemon loop for one book: scrape, then wait out its cadence; returns once stop_event is set."""
+    while not stop_event.is_set():
+        try:
+            plan = current_plan(week_override)
+        except Exception as e:
+            print(f"[{book}] ❌ Could not fetch the event list: {e}")
+            with _plan_lock: # Fall back on the last plan fetched
+                plan = _plan['plan']
+        if plan is None:
+            update_status(book, state='idle', next_run=(datetime.now() + IDLE_RECHECK).isoformat(timespec='seconds'),
+                          next_reason='no upcoming games')
+            stop_event.wait(IDLE_RECHECK.total_seconds())
+            continue
+
+        started = time.time()
+        counts = run_book(book, plan['week'])
+        refresh_snapshot(plan['week'])
+        quiet = bool(counts) and counts.get('changed', 0) + counts.get('new', 0) == 0 # Heartbeats are not movement
+
+        until_kickoff = plan['next_kickoff'] - datetime.now(timezone.utc)
+        wait, reason = next_interval(until_kickoff, quiet)
+        wait_seconds = max(0.0, wait.total_seconds() - (time.time() - started))
+        next_run = datetime.now() + timedelta(seconds=wait_seconds)
+        update_status(book, next_run=next_run.isoformat(timespec='seconds'), next_reason=reason, quiet=quiet,
+                      interval_s=round(wait.total_seconds()), next_kickoff=plan['next_kickoff'].isoformat())
+        print(f"[{book}] Next run at {next_run:%a %H:%M:%S} ({reason}; kickoff in {str(until_kickoff).split('.')[0]})")
+        stop_event.wait(wait_seconds)
+
+def run_daemon(week_override=None):
+    print("--- Scrape scheduler running (Ctrl+C to stop) ---")
+    stop_event = threading.Event()
+    workers = [threading.Thread(target=book_worker, args=(book, stop_event, week_override), name=f"{book}-scraper", daemon=True)
+               for book in SCRAPERS]
+    update_status(daemon_pid=os.getpid(), daemon_started=datetime.now().isoformat(timespec='seconds'))
+    for worker in workers:
+        worker.start()
+    try:
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping after the current runs finish...")
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+def print_status():
+    status = read_status()
+    print(f"Status as of {status.get('updated_at')}:")
+    for book, entry in status.get('books', {}).items():
+        print(f"  {book}: {entry.get('state')}, week {entry.get('week')}, last run {entry.get('last_started')} "
+              f"took {entry.get('last_duration_s')}s (ok={entry.get('last_ok')}), next {entry.get('next_run')} "
+              f"({entry.get('next_reason')})")
+
+
+def main(week_number=None):
+    # --- 2. Get the week number ONCE ---
+    if week_number is None:
+        try:
+            week_number_str = input("Enter the current NFL week number (e.g., 7): ")
+            week_number = int(week_number_str)
+        except ValueError:
+            print("Invalid week number. Please enter a whole number.")
+            return
 
     print(f"\n--- Starting All Scrapers for Week {week_number} ---")
     start_time = time.time()
@@ -28,19 +280,11 @@ def main():
     # This helps us print messages when each thread is done
     def fanduel_wrapper():
         print("[Thread 1] ... Starting FanDuel Scraper ...")
-        try:
-            run_fanduel(week_number)
-            print("[Thread 1] ✅ FanDuel Scraper Finished.")
-        except Exception as e:
-            print(f"[Thread 1] ❌ FanDuel Scraper FAILED: {e}")
+        run_book('fanduel', week_number)
 
     def draftkings_wrapper():
         print("[Thread 2] ... Starting DraftKings Scraper ...")
-        try:
-            run_draftkings(week_number)
-            print("[Thread 2] ✅ DraftKings Scraper Finished.")
-        except Exception as e:
-            print(f"[Thread 2] ❌ DraftKings Scraper FAILED: {e}")
+        run_book('draftkings', week_number)
 
     # --- 4. Create, start, and join the threads ---
     fanduel_thread = threading.Thread(target=fanduel_wrapper)
@@ -57,5 +301,19 @@ def main():
     end_time = time.time()
     print(f"\n--- All Scraping Complete in {end_time - start_time:.2f} seconds ---")
 
+    # --- 5. (NEW) Refresh the dashboard's memory-mapped week snapshot, if that mode is on ---
+    refresh_snapshot(week_number)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape FanDuel and DraftKings props, once or on a schedule.")
+    parser.add_argument('--week', type=int, help="NFL week (default: asked for; in daemon mode, worked out from kickoff dates)")
+    parser.add_argument('--daemon', action='store_true', help="Keep scraping at a cadence that tightens towards kickoff")
+    parser.add_argument('--status', action='store_true', help="Show each book's last run and next scheduled run")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    elif args.daemon:
+        run_daemon(args.week)
+    else:
+        main(args.week)
@@ -0,0 +1,107 @@
+import csv
+import os
+import sys
+
+import payload_state
+
+# --- Where a scrape's rows go ---
+# Shared by both book scrapers: the history CSVs (or their compacted *_events.csv), the optional Parquet
+# odds store and the optional SQLite odds history. The storage modules live next to app.py; this is the
+# one place that makes them importable, for the scrapers and for scrape_all.py.
+APP_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if APP_DIR not in sys.path:
+    sys.path.append(APP_DIR)
+
+import history_events  # noqa: E402
+import odds_db  # noqa: E402
+import odds_store  # noqa: E402
+
+
+def append_to_historical_csv(new_data, output_file, default_fieldnames, compact=False):
+    """
+    Appends new data to a CSV, writing a header if the file is new.
+    With compact=True, or once the file has been compacted by history_events.py, only the change events
+    are appended, to the matching *_events.csv. Returns False if the write failed.
+    """
+    if not new_data:
+        print(f"No new data to write for {output_file}.")
+        return True
+
+    events_file = history_events.events_path_for(output_file)
+    if compact or os.path.exists(events_file):
+        try:
+            written = history_events.append_events(new_data, events_file, default_fieldnames)
+            print(f"  Appended {written} change events ({len(new_data)} rows scraped) to {events_file}")
+            return True
+        except Exception as e:
+            print(f"  ERROR writing file {events_file}: {e}")
+            return False
+
+    # Add timestamp to the fieldnames
+    fieldnames = default_fieldnames + ['scrape_timestamp']
+    file_exists = os.path.exists(output_file)
+
+    try:
+        with open(output_file, "a", newline="", encoding="utf-8") as f:
+            # Use extrasaction='ignore' to be safe with any column mismatches
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            if not file_exists:
+                writer.writeheader()  # Write header only if file is new
+            writer.writerows(new_data)
+        print(f"  Appended {len(new_data)} new rows to {output_file}")
+        return True
+    except Exception as e:
+        print(f"  ERROR writing file {output_file}: {e}")
+        return False
+
+def write_to_odds_store(new_data, base_dir, week_number, book, kind, default_fieldnames):
+    """Mirrors a scrape into the Parquet odds store, once odds_store.py has been run to set it up."""
+    store_root = os.path.join(base_dir, odds_store.STORE_DIR_NAME)
+    if not new_data or not odds_store.is_enabled(store_root):
+        return
+    try:
+        written = odds_store.write_snapshot(new_data, store_root, week_number, book, kind,
+                                            columns=default_fieldnames + ['scrape_timestamp'])
+        print(f"  Wrote {len(new_data)} rows to {written}")
+    except Exception as e:
+        print(f"  ERROR writing odds store ({kind}): {e}")
+
+def insert_into_odds_db(new_data, base_dir, week_number, book):
+    """Bulk-inserts the scrape's props in one transaction, once odds_db.py has created the database."""
+    db_path = os.path.join(base_dir, odds_db.DB_FILE_NAME)
+    if not new_data or not odds_db.is_enabled(db_path):
+        return
+    try:
+        inserted = odds_db.insert_scrape(db_path, new_data, week_number, book)
+        print(f"  Inserted {inserted} rows into {db_path}")
+    except Exception as e:
+        print(f"  ERROR writing odds history database: {e}")
+
+def write_scrape(new_data, output_file, default_fieldnames, base_dir, week_number, book, kind, compact=False):
+    """
+    Writes one scrape's props or game lines to every enabled sink (props also go to the odds database).
+    Returns False if the history CSV write failed.
+    """
+    written = append_to_historical_csv(new_data, output_file, default_fieldnames, compact=compact)
+    write_to_odds_store(new_data, base_dir, week_number, book, kind, default_fieldnames)
+    if kind == 'props':
+        insert_into_odds_db(new_data, base_dir, week_number, book)
+    return written
+
+
+# --- Unchanged-payload state (see payload_state.py) ---
+def load_payload_hashes(week_dir, book, props_file):
+    """(state_file, payload hashes from the last scrape) for a book's prop payloads."""
+    state_file = payload_state.state_path(week_dir, book)
+    return state_file, payload_state.load_state(state_file, [props_file, history_events.events_path_for(props_file)])
+
+def save_payload_hashes(state_file, payload_hashes, written_digests):
+    """
+    Remembers the payloads whose props were just written, so identical ones are skipped next time.
+    Only call it after a successful write: the others must be parsed and written again.
+    """
+    if not written_digests:
+        return
+    for key, digest in written_digests.items():
+        payload_state.mark_written(payload_hashes, key, digest)
+    payload_state.save_state(state_file, payload_hashes)
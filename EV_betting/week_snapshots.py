@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+
+try:
+    import pyarrow as pa
+except ImportError: # Optional: without pyarrow every worker loads the weeks itself
+    pa = None
+
+# --- Memory-mapped week snapshots ---
+# An ingestion step (this script, or scrape_all.py after a scrape) writes each week's cleaned frame and
+# its current board to uncompressed Arrow IPC files. Dashboard worker processes memory-map them, so
+# the column buffers live once in the OS page cache instead of once per worker, and a cold worker
+# skips all CSV parsing and cleaning. Files are replaced by atomic rename: a worker that already
+# mapped the old file keeps a valid view, the next cache miss maps the new one.
+SNAPSHOT_DIR_NAME = 'snapshots'
+FRAMES = ['props', 'board']
+_METADATA_KEY = b'ev_betting'
+
+
+def is_enabled(snapshot_dir):
+    """Snapshot mode is opt-in: on once pyarrow is installed and the snapshot directory exists."""
+    return pa is not None and os.path.isdir(snapshot_dir)
+
+def snapshot_path(snapshot_dir, week_number, frame):
+    return os.path.join(snapshot_dir, f'week_{week_number}_{frame}.arrow')
+
+def _fingerprint_json(fingerprint):
+    return json.dumps([list(item) for item in fingerprint])
+
+def write_week_snapshot(snapshot_dir, week_number, props_df, board_df, sportsbooks, fingerprint):
+    """Writes both frames, tagged with the source fingerprint they were built from."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    metadata = {'fingerprint': _fingerprint_json(fingerprint), 'sportsbooks': sportsbooks}
+    # The board goes first: a reader that sees the new props file is guaranteed a matching board
+    for frame, df in [('board', board_df), ('props', props_df)]:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**table.schema.metadata, _METADATA_KEY: json.dumps(metadata).encode()})
+        path = snapshot_path(snapshot_dir, week_number, frame)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+def _read_mapped(path):
+    with pa.memory_map(path, 'r') as source: # Buffers keep the mapping alive after the file object closes
+        table = pa.ipc.open_file(source).read_all()
+    return table, json.loads(table.schema.metadata[_METADATA_KEY])
+
+def open_week_snapshot(snapshot_dir, week_number, fingerprint):
+    """
+    Returns (props_df, board_df, sportsbooks) from the week's snapshot, or None if there is none or it
+    was built from different source files than `fingerprint` describes (the sources changed since).
+    """
+    frames = {}
+    for frame in FRAMES:
+        path = snapshot_path(snapshot_dir, week_number, frame)
+        if not os.path.exists(path):
+            return None
+        table, metadata = _read_mapped(path)
+        if metadata['fingerprint'] != _fingerprint_json(fingerprint):
+            return None
+        frames[frame] = table.to_pandas(split_blocks=True) # One block per column: numeric columns stay views on the map
+    return frames['props'], frames['board'], metadata['sportsbooks']
+
+
+def build_snapshots(weeks=None):
+    """Loads each week through the app's cleaning and writes its snapshot. Returns the weeks written."""
+    import app # Deferred: the app imports this module
+
+    snapshot_dir = app.get_snapshot_dir()
+    written = []
+    for week_number in weeks or app.get_available_weeks(app.get_data_dir()):
+        fingerprint = app.get_week_fingerprint(week_number)
+        props_df, error_msg, sportsbooks, ingest_state = app.load_week_data(week_number)
+        if error_msg or props_df is None:
+            print(f"  Week {week_number}: skipped ({error_msg})")
+            continue
+        write_week_snapshot(snapshot_dir, week_number, props_df, ingest_state['board'], sportsbooks, fingerprint)
+        written.append(week_number)
+        print(f"  Week {week_number}: {len(props_df)} rows, board {len(ingest_state['board'])} rows")
+    return written
+
+def refresh_if_enabled(weeks):
+    """For ingestion hooks (scrape_all.py): rewrites the weeks' snapshots if snapshot mode is on."""
+    if pa is None:
+        return []
+    import app
+    if not is_enabled(app.get_snapshot_dir()):
+        return []
+    return build_snapshots(weeks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write memory-mapped Arrow snapshots of the weeks for the dashboard workers.")
+    parser.add_argument('weeks', nargs='*', type=int, help="Weeks to snapshot (default: all)")
+    args = parser.parse_args()
+
+    if pa is None:
+        raise SystemExit("pyarrow is required for week snapshots (pip install pyarrow).")
+    written = build_snapshots(args.weeks)
+    print(f"✅ Wrote snapshots for weeks {written}.")
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'EV_betting'))
+import app  # noqa: E402
+
+WEEKS = range(6, 12)
+
+
+# --- Reference: find_arbitrage_opportunities as it was before vectorization (per-group loop) ---
+def convert_odds_to_prob(odds):
+    odds = float(odds)
+    if odds > 0: return 100 / (odds + 100)
+    return abs(odds) / (abs(odds) + 100)
+
+def reference_find_arbitrage_opportunities(props_df):
+    if props_df is None or props_df.empty: return []
+    df = props_df.copy()
+    df.dropna(subset=['over_odds', 'under_odds', 'line', 'player_name_norm', 'prop_main', 'prop_qualifier'], inplace=True)
+    opportunities = []
+    grouped = df.groupby(['player_name_norm', 'prop_main', 'prop_qualifier', 'line'])
+    for _, group in grouped:
+        if len(group['sportsbook'].unique()) < 2: continue
+        best_over_row = group.loc[group['over_odds'].idxmax()]
+        best_under_row = group.loc[group['under_odds'].idxmax()]
+        prob_over = convert_odds_to_prob(best_over_row['over_odds'])
+        prob_under = convert_odds_to_prob(best_under_row['under_odds'])
+        if (prob_over + prob_under) < 1.0:
+            profit_margin = (1 - (prob_over + prob_under)) * 100
+            prop_main = group['prop_main'].iloc[0]
+            prop_qualifier = group['prop_qualifier'].iloc[0]
+            prop_type_display = f"{prop_main} ({prop_qualifier})" if prop_qualifier and prop_qualifier != 'Full Game' else prop_main
+            opportunities.append({
+                'player_name': group['player_name'].iloc[0], 'prop_type': prop_type_display,
+                'line': group['line'].iloc[0],
+                'bet_on_over': {'sportsbook': best_over_row['sportsbook'], 'odds': int(best_over_row['over_odds'])},
+                'bet_on_under': {'sportsbook': best_under_row['sportsbook'], 'odds': int(best_under_row['under_odds'])},
+                'profit_margin': f"{profit_margin:.2f}%"
+            })
+    return opportunities
+
+
+def week_frames(week_number):
+    """The week's full props history and its latest board, as compute_week_analytics sees them."""
+    props_df, error_msg, _ = app.get_combined_data(week_number)
+    if props_df is None or props_df.empty:
+        pytest.skip(f"No data for week {week_number}: {error_msg}")
+    return {'history': props_df, 'latest': app.get_latest_props(props_df)}
+
+
+@pytest.mark.parametrize('week_number', WEEKS)
+@pytest.mark.parametrize('frame', ['latest', 'history'])
+def test_matches_reference(week_number, frame):
+    props_df = week_frames(week_number)[frame]
+    assert app.find_arbitrage_opportunities(props_df) == reference_find_arbitrage_opportunities(props_df)
+
+def test_empty_frame():
+    assert app.find_arbitrage_opportunities(None) == []
+    assert app.find_arbitrage_opportunities(app.pd.DataFrame()) == []